@@ -1,4 +1,5 @@
 import ctypes
+import multiprocessing
 import os
 import sys
 
@@ -19,6 +20,8 @@ ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myAppID)
 basedir = os.path.dirname(__file__)
 
 if __name__ == "__main__":
+    # the worker processes of the process manager start from this module once frozen
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = FileExplorer()
     window.show()
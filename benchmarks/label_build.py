@@ -0,0 +1,81 @@
+"""
+compares how long it takes to build a scene with extruded text mesh labels and with glyph atlas labels, with leaves
+of their own entities and with instanced leaves, and how many entities the scene ends up with.
+
+    python -m benchmarks.label_build [--entries 500] [--length 40] [--repeat 3]
+
+runs offscreen, the timings cover building the entities and the label geometry, not drawing them
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from core.structs import LeafLabelMode, LeafRenderMode
+from views.sections.scene import V3DWindow
+
+
+def makeTree(root: str, entries: int, length: int):
+    """
+    fills root with empty files whose names are about length characters long
+    :param root:
+    :param entries:
+    :param length:
+    :return:
+    """
+    for i in range(entries):
+        name = f"{i:05d}_" + ("long file name " * (length // 15 + 1))[:max(0, length - 6)].strip()
+        open(os.path.join(root, name.replace(" ", "_") + ".txt"), "w").close()
+
+
+def timeSceneBuilds(renderMode: LeafRenderMode, labelMode: LeafLabelMode, path: str,
+                    repeat: int) -> tuple[list[float], int]:
+    """
+    builds the scene of path repeat times
+    :param renderMode:
+    :param labelMode:
+    :param path:
+    :param repeat:
+    :return: the duration of every build, in seconds, and the entities of the scene
+    """
+    view = V3DWindow(renderMode=renderMode, labelMode=labelMode)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        view.updateScene(path)
+        QApplication.processEvents()
+        timings.append(time.perf_counter() - start)
+    entities = view.entityCount()
+    view.clearScene()
+    return timings, entities
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--length", type=int, default=40, help="length of the file names")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        makeTree(root, args.entries, args.length)
+        print(f"{args.entries} entries, names of {args.length} characters, best of {args.repeat}")
+        for renderMode in LeafRenderMode:
+            for labelMode in LeafLabelMode:
+                timings, entities = timeSceneBuilds(renderMode, labelMode, root, args.repeat)
+                print(f"  {renderMode.name:<9} {labelMode.name:<5} best {min(timings) * 1000:9.1f} ms   "
+                      f"median {statistics.median(timings) * 1000:9.1f} ms   {entities:7d} entities")
+
+    return app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+navigates back and forth between two directories and checks that the scene does not grow.
+
+    python -m benchmarks.navigation_memory [--navigations 1000] [--entries 150]
+
+runs offscreen. the number of Qt objects under the root entity and the resident memory are sampled along the way,
+the exit status is 1 when either keeps growing after the warm up
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication, QEvent, QObject
+from PySide6.QtWidgets import QApplication
+
+from views.sections.scene import V3DWindow
+
+
+def residentMemory() -> int:
+    """
+    resident memory of the process in bytes, 0 where it cannot be read
+    :return:
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return 0
+
+
+def makeTree(root: str, entries: int):
+    """
+    fills root with a mix of files and folders
+    :param root:
+    :param entries:
+    :return:
+    """
+    for i in range(entries):
+        path = os.path.join(root, f"entry_{i:05d}")
+        if i % 4 == 0:
+            os.mkdir(path)
+        else:
+            open(path + ".txt", "w").close()
+
+
+def settle():
+    """
+    runs the deferred deletions of the destroyed entities
+    :return:
+    """
+    QApplication.processEvents()
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--navigations", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=150, help="entries of the larger directory")
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=0.1, help="memory growth allowed after the warm up")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as large, tempfile.TemporaryDirectory() as small:
+        makeTree(large, args.entries)
+        makeTree(small, max(1, args.entries // 3))
+
+        view = V3DWindow()
+        every = max(1, args.navigations // args.samples)
+        samples = []
+        for i in range(args.navigations):
+            view.updateScene(large if i % 2 == 0 else small)
+            settle()
+            if (i + 1) % every == 0:
+                objects = len(view.rootEntity.findChildren(QObject))
+                samples.append((i + 1, objects, residentMemory()))
+                print(f"  {i + 1:6d} navigations   {objects:7d} objects   {samples[-1][2] / 2 ** 20:8.1f} MiB")
+
+    # the first sample is the warm up, the pool and the caches are full by then
+    _, baseObjects, baseMemory = samples[0]
+    _, lastObjects, lastMemory = samples[-1]
+    grew = lastObjects > baseObjects or (baseMemory and lastMemory > baseMemory * (1 + args.tolerance))
+    print("memory grows with navigations" if grew else "memory is flat")
+    app.processEvents()
+    return 1 if grew else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
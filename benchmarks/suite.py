@@ -0,0 +1,278 @@
+"""
+times the directory helpers, the scene stages and the path manager over synthetic directory trees.
+
+    python -m benchmarks.suite [--sizes 100 1000 10000] [--shapes wide deep] [--repeat 3] [--output results.json]
+    python -m benchmarks.suite --compare before.json --output after.json
+
+runs offscreen. a wide tree holds all its entries in one directory, a deep one spreads them over nested directories
+of a few entries each. benchmarks of a single directory are only run on wide trees, the root of a deep one holds
+DEEP_FANOUT entries whatever its size. every benchmark is run repeat times and saved with its best and median time,
+--compare prints the change against an earlier run and exits with 1 when anything got slower than the threshold
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Any, Callable
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# the size cache of the benchmarks is kept away from the one of the user
+os.environ["LOCALAPPDATA"] = tempfile.mkdtemp(prefix="file_world_bench_")
+atexit.register(shutil.rmtree, os.environ["LOCALAPPDATA"], True)
+
+from PySide6.QtWidgets import QApplication
+
+from core.utils.helpers import countItemsInDirectory, directoryType, get_directory_size, getDirectorProperties, \
+    planScene
+from core.utils.path_manager import PathManager
+from core.utils.perf_monitor import perfMonitor
+from core.utils.size_cache import directorySizeCache
+from views.sections.scene import V3DWindow
+
+SHAPES = ("wide", "deep")
+
+# entries of every directory of a deep tree, half of them folders
+DEEP_FANOUT = 8
+
+# scenes are only built up to this many entries, larger ones are virtualized and cost the same
+SCENE_ENTRIES = 10_000
+
+
+def makeTree(root: str, entries: int, shape: str):
+    """
+    fills root with entries files and folders
+    :param root:
+    :param entries:
+    :param shape: wide puts them all in root, deep in directories of DEEP_FANOUT entries nested breadth first
+    :return:
+    """
+    if shape == "wide":
+        for i in range(entries):
+            path = os.path.join(root, f"entry_{i:07d}")
+            if i % 4 == 0:
+                os.mkdir(path)
+            else:
+                open(path + ".txt", "w").close()
+        return
+
+    created = 0
+    directories = deque([root])
+    while created < entries:
+        parent = directories.popleft()
+        for i in range(DEEP_FANOUT):
+            if created >= entries:
+                break
+            path = os.path.join(parent, f"entry_{i}")
+            if i % 2 == 0:
+                os.mkdir(path)
+                directories.append(path)
+            else:
+                with open(path + ".txt", "w") as f:
+                    f.write("x" * i)
+            created += 1
+
+
+def timeIt(task: Callable[[], Any], repeat: int, setup: Callable[[], Any] = None) -> list[float]:
+    """
+    runs task repeat times
+    :param task:
+    :param repeat:
+    :param setup: called before every run, outside the timing
+    :return: the duration of every run, in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        task()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def timePlanStages(root: str, repeat: int) -> dict[str, list[float]]:
+    """
+    times the stages of building a scene that need no entity, as recorded by the perf monitor
+    :param root:
+    :param repeat:
+    :return: the durations of the listing, models and layout stages
+    """
+    stages = {"listing": [], "models": [], "layout": []}
+    for _ in range(repeat):
+        perfMonitor.reset()
+        planScene((root, 20))
+        for name, timings in stages.items():
+            timings.append(perfMonitor.timer(name)[0])
+    return stages
+
+
+def timePathManager(root: str, entries: int, repeat: int) -> list[float]:
+    """
+    records entries paths in a path manager then walks all the way back and forward again
+    :param root:
+    :param entries:
+    :param repeat:
+    :return:
+    """
+    def task():
+        manager = PathManager()
+        for _ in range(entries):
+            manager.updatePaths(root)
+        for _ in range(entries):
+            manager.previous()
+        for _ in range(entries):
+            manager.next()
+
+    return timeIt(task, repeat)
+
+
+def timeSceneBuilds(view: V3DWindow, root: str, other: str, repeat: int) -> list[float]:
+    """
+    builds the scene of root, from the scene of another directory each time
+    :param view:
+    :param root:
+    :param other:
+    :param repeat:
+    :return:
+    """
+    timings = []
+    for _ in range(repeat):
+        view.updateScene(other)
+        QApplication.processEvents()
+        start = time.perf_counter()
+        view.updateScene(root)
+        QApplication.processEvents()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def runSuite(sizes: list[int], shapes: list[str], repeat: int, scene: bool = True) -> list[dict]:
+    """
+    runs every benchmark over a tree of every size and shape
+    :param sizes:
+    :param shapes:
+    :param repeat:
+    :param scene: also builds the scenes of the trees
+    :return: one record per benchmark, tree shape and size
+    """
+    results = []
+
+    def add(name: str, shape: str, entries: int, timings: list[float]):
+        results.append({"benchmark": name, "shape": shape, "entries": entries, "best": min(timings),
+                        "median": statistics.median(timings), "repeat": len(timings)})
+        print(f"  {name:<20} {shape:<5} {entries:>9,}   best {min(timings) * 1000:10.2f} ms   "
+              f"median {statistics.median(timings) * 1000:10.2f} ms")
+
+    view = V3DWindow() if scene else None
+    with tempfile.TemporaryDirectory() as other:
+        for shape in shapes:
+            for entries in sizes:
+                with tempfile.TemporaryDirectory() as root:
+                    makeTree(root, entries, shape)
+                    names = os.listdir(root)
+
+                    add("directory_size", shape, entries,
+                        timeIt(lambda: get_directory_size(root, use_cache=False), repeat))
+                    add("directory_size_par", shape, entries,
+                        timeIt(lambda: get_directory_size(root, use_cache=False, workers=None), repeat))
+                    # every run walks the tree, not the size cache filled by the previous one
+                    add("properties", shape, entries, timeIt(lambda: getDirectorProperties(root), repeat,
+                                                             lambda: directorySizeCache.invalidate(root)))
+
+                    # these only read the root, which holds DEEP_FANOUT entries in a deep tree of any size
+                    if shape == "wide":
+                        add("directory_type", shape, entries,
+                            timeIt(lambda: [directoryType(os.path.join(root, n)) for n in names], repeat))
+                        add("count_items", shape, entries, timeIt(lambda: countItemsInDirectory(root), repeat))
+                        for stage, timings in timePlanStages(root, repeat).items():
+                            add(f"scene_{stage}", shape, entries, timings)
+                        if view is not None and len(names) <= SCENE_ENTRIES:
+                            add("scene_build", shape, entries, timeSceneBuilds(view, root, other, repeat))
+                    add("path_manager", shape, entries, timePathManager(root, min(entries, 10_000), repeat))
+
+                if view is not None:
+                    view.clearScene()
+                    view.leafPool().trim()
+    return results
+
+
+def compare(before: dict, after: dict, threshold: float) -> bool:
+    """
+    prints the change of every benchmark found in both runs
+    :param before:
+    :param after:
+    :param threshold: relative slowdown of the best time counted as a regression
+    :return: True when a benchmark regressed
+    """
+    key = lambda r: (r["benchmark"], r["shape"], r["entries"])
+    previous = {key(r): r for r in before["results"]}
+    regressed = False
+    print(f"against {before.get('commit') or 'an unknown commit'}")
+    for record in after["results"]:
+        old = previous.get(key(record))
+        if old is None or old["best"] <= 0:
+            continue
+        change = record["best"] / old["best"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  slower"
+            regressed = True
+        print(f"  {record['benchmark']:<20} {record['shape']:<5} {record['entries']:>9,}   "
+              f"{change * 100:+7.1f} %{flag}")
+    return regressed
+
+
+def currentCommit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000],
+                        help="entries of the trees, up to 1000000")
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-scene", action="store_true", help="skips building the scenes")
+    parser.add_argument("--output", help="json file the results are written to")
+    parser.add_argument("--compare", help="json file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    report = {
+        "commit": currentCommit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        # the parallel walk can only win with several cores, compare directory_size_par on such a machine
+        "cpus": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": runSuite(args.sizes, args.shapes, args.repeat, not args.no_scene),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    regressed = False
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(json.load(f), report, args.threshold)
+
+    app.processEvents()
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
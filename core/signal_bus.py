@@ -5,8 +5,12 @@ class SignalBus(QObject):
     onTasksChanged = Signal()
     onTaskCompleted = Signal(object)
     onTaskCreated = Signal(object)
+    # progress of the running tasks by pid, batched by the process manager
+    onTaskProgress = Signal(object)
     CreateSubprocess = Signal(object)
     CreateConsoleAlert = Signal(object)
+    # a watched file or directory changed on disk
+    onPathChanged = Signal(str)
 
 
 signalBus = SignalBus()
@@ -22,6 +22,36 @@ class LeafType(Enum):
     MOUNT = 4
 
 
+class LeafRenderMode(Enum):
+    ENTITY = 0
+    INSTANCED = 1
+
+
+class LeafLabelMode(Enum):
+    MESH = 0
+    ATLAS = 1
+
+
+class LeafBillboardMode(Enum):
+    PER_LEAF = 0
+    SHARED = 1
+
+
+class LeafPickMode(Enum):
+    ENTITY = 0
+    RAY = 1
+
+
+class LaunchPolicy(Enum):
+    REJECT = 0
+    SUPERSEDE = 1
+
+
+class TaskBackend(Enum):
+    THREAD = 0
+    PROCESS = 1
+
+
 # region - alert
 
 class AlertDisplayMode(Enum):
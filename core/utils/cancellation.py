@@ -0,0 +1,34 @@
+import threading
+
+
+class TaskCancelledError(Exception):
+    """
+    raised inside a task once its cancellation token has been cancelled
+    """
+
+
+class CancellationToken:
+    def __init__(self):
+        """
+        flag shared between the process manager and a running task.
+        long tasks check it regularly and stop by raising TaskCancelledError
+        """
+        self.__event = threading.Event()
+
+    def cancel(self):
+        """
+        asks the task holding the token to stop
+        :return:
+        """
+        self.__event.set()
+
+    def isCancelled(self) -> bool:
+        return self.__event.is_set()
+
+    def raiseIfCancelled(self):
+        """
+        raises TaskCancelledError if the token has been cancelled
+        :return:
+        """
+        if self.__event.is_set():
+            raise TaskCancelledError()
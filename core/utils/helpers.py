@@ -1,64 +1,142 @@
 import os
 import platform
 import datetime
+from typing import Any, Callable
 
 from PySide6.QtGui import Qt
 from PySide6.QtWidgets import QTableWidgetItem
 
 from core.structs import LeafType
+from core.utils.cancellation import CancellationToken
+from core.utils.perf_monitor import perfMonitor
+from core.utils.size_cache import directorySizeCache
+from core.utils.size_walker import ParallelSizeWalker
+from core.utils.sphere_layout import fibonacciSphere
+from core.utils.task_progress import ProgressReporter
+from models.directory_snapshot import DirectoryEntryModel, DirectorySnapshot
+from models.scene_plan import ScenePlan
+from models.tree_leaf_model import TreeLeafModel
 
 
-def get_directory_size(directory_path):
+def get_directory_size(directory_path, use_cache: bool = True, workers: int = 1,
+                       on_progress: Callable[[int, int], Any] = None, token: CancellationToken = None):
     """
     Calculate the total size of a directory including its subdirectories.
+    By default, unchanged subdirectories are served from the persistent size cache.
 
     :param directory_path: Path to the directory
+    :param use_cache: whether to read and update the size cache
+    :param workers: number of threads walking the tree when the cache is not used, None picks one from the number of
+        cores. the cached walk runs on the calling thread
+    :param on_progress: called with the (bytes, entries) scanned so far
+    :param token: stops the walk with TaskCancelledError once cancelled
     :return: Total size in bytes
     """
+    if use_cache:
+        if not os.path.isdir(directory_path):
+            return os.path.getsize(directory_path)
+        return directorySizeCache.size(directory_path, on_progress, token)
+
+    if workers != 1 or on_progress is not None or token is not None:
+        return ParallelSizeWalker(workers).size(directory_path, on_progress, token)
+
     total_size = 0
 
     try:
         for entry in os.scandir(directory_path):
             if entry.is_dir(follow_symlinks=False):
-                total_size += get_directory_size(entry.path)
+                total_size += get_directory_size(entry.path, use_cache=False)
             else:
                 total_size += entry.stat(follow_symlinks=False).st_size
     except NotADirectoryError:
         return os.path.getsize(directory_path)
     except PermissionError:
-        print(f"Permission denied: {directory_path}")
+        # directories that cannot be read count for nothing, like in the size walkers
         return 0
 
     return total_size
 
 
-def getDirectorProperties(path: str) -> list[list[QTableWidgetItem]]:
+def getDirectorProperties(path: str, workers: int = 1,
+                          token: CancellationToken = None) -> list[list[QTableWidgetItem]]:
     """
     gets the properties of item of the chosen item as an (N,2) arr
     :param path:
+    :param workers: number of threads computing the size, None picks one from the number of cores. a single
+        thread is the fastest measured so far
+    :param token: stops the size walk once cancelled
     :return:
     """
 
     if not os.path.exists(path):
         return []
     try:
-        size = get_directory_size(path)
-        arr = [
-            [QTableWidgetItem("Type"), QTableWidgetItem("directory" if os.path.isdir(path) else "file")],
-            [QTableWidgetItem("Size"), QTableWidgetItem(f"{size:,} bytes")],
-            [QTableWidgetItem("Location"), QTableWidgetItem(path)],
-            [QTableWidgetItem("Date modified"),
-             QTableWidgetItem(str(datetime.datetime.fromtimestamp(os.path.getmtime(path))))],
+        size = get_directory_size(path, workers=workers, token=token)
+        return [
+            propertyItems("Type", "directory" if os.path.isdir(path) else "file"),
+            propertyItems("Size", f"{size:,} bytes"),
+            propertyItems("Location", path),
+            propertyItems("Date modified", str(datetime.datetime.fromtimestamp(os.path.getmtime(path)))),
         ]
-        for items in arr:
-            items[0].setFlags(Qt.ItemFlag.ItemIsEnabled)
-            items[1].setFlags(Qt.ItemFlag.NoItemFlags)
-        return arr
-    except OSError as e:
-        print("Error encountered", e)
+    except OSError:
         return []
 
 
+def getPathProperties(path: str, entry: DirectoryEntryModel = None) -> list[list[QTableWidgetItem]]:
+    """
+    gets the properties that need no walk of the directory, as an (N,2) arr.
+    the size of a directory is left pending, it is computed by computeDirectorySize
+    :param path:
+    :param entry: the snapshot entry of the path, saves the stat when provided
+    :return:
+    """
+    if entry is not None and entry.mtime is not None:
+        isDir = entry.isDirectory()
+        size, mtime = entry.size, entry.mtime
+    else:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return []
+        isDir = os.path.isdir(path)
+        size, mtime = stat.st_size, stat.st_mtime
+
+    return [
+        propertyItems("Type", "directory" if isDir else "file"),
+        propertyItems("Size", "computing..." if isDir else f"{size:,} bytes"),
+        propertyItems("Location", path),
+        propertyItems("Date modified", str(datetime.datetime.fromtimestamp(mtime))),
+    ]
+
+
+def computeDirectorySize(path: str, progress: ProgressReporter = None, token: CancellationToken = None) -> int:
+    """
+    task computing the size of a directory, reporting the entries and bytes scanned so far
+    :param path:
+    :param progress:
+    :param token:
+    :return: size in bytes
+    """
+    def onProgress(filesBytes: int, entries: int):
+        progress.update(entries, filesBytes)
+
+    with perfMonitor.measure("size walk"):
+        return get_directory_size(path, on_progress=onProgress if progress is not None else None, token=token)
+
+
+def propertyItems(name: str, value: str) -> list[QTableWidgetItem]:
+    """
+    creates the (name, value) cells of one row of the properties table
+    :param name:
+    :param value:
+    :return:
+    """
+    items = [QTableWidgetItem(name), QTableWidgetItem(value)]
+    items[0].setFlags(Qt.ItemFlag.ItemIsEnabled)
+    items[1].setFlags(Qt.ItemFlag.NoItemFlags)
+    return items
+
+
 def directoryType(path: str) -> LeafType:
     """
     gets the type of the directory
@@ -87,6 +165,86 @@ def directoryType(path: str) -> LeafType:
     return test_path(path)
 
 
+def snapshotDirectory(path: str, token: CancellationToken = None) -> DirectorySnapshot:
+    """
+    lists the directory once with os.scandir, reading the type, size and mtime of every item from its DirEntry.
+    that is a single stat per item, none at all on Windows where scandir already returns them
+    :param path:
+    :param token: stops the listing with TaskCancelledError once cancelled
+    :return:
+    """
+    try:
+        parentStat = os.stat(path)
+        entries = []
+        with os.scandir(path) as it:
+            for dirEntry in it:
+                if token is not None and len(entries) % 256 == 0:
+                    token.raiseIfCancelled()
+                entries.append(entryModel(dirEntry, parentStat))
+    except FileNotFoundError as e:
+        print(f"The directory {path} does not exist.")
+        return DirectorySnapshot(path, error=e)
+    except PermissionError as e:
+        print(f"Permission denied to access the directory {path}.")
+        return DirectorySnapshot(path, error=e)
+    except OSError as e:
+        print("Error encountered", e)
+        return DirectorySnapshot(path, error=e)
+
+    return DirectorySnapshot(path, entries, parentStat.st_mtime_ns)
+
+
+def planScene(params: tuple[str, float], token: CancellationToken = None) -> ScenePlan:
+    """
+    task listing a directory and preparing the leaf model and the position of each of its items, the part of
+    building a scene that needs no entity
+    :param params: the (path, radius of the sphere the items are laid out on)
+    :param token: stops the task with TaskCancelledError once cancelled
+    :return:
+    """
+    path, radius = params
+    with perfMonitor.measure("listing"):
+        snapshot = snapshotDirectory(path, token)
+
+    with perfMonitor.measure("models"):
+        models = []
+        for entry in snapshot:
+            if token is not None and len(models) % 256 == 0:
+                token.raiseIfCancelled()
+            models.append(TreeLeafModel(entry.path, entry.name, entry.leafType, entry.path))
+
+    with perfMonitor.measure("layout"):
+        layout = fibonacciSphere(len(models), radius)
+
+    return ScenePlan(snapshot, models, layout)
+
+
+def entryModel(dirEntry: os.DirEntry, parentStat: os.stat_result) -> DirectoryEntryModel:
+    """
+    classifies a single scandir entry the same way directoryType does, without the extra stats
+    :param dirEntry:
+    :param parentStat: stat of the listed directory, used to tell mount points apart
+    :return:
+    """
+    try:
+        if dirEntry.is_file():
+            leafType = LeafType.FILE
+        elif dirEntry.is_dir():
+            leafType = LeafType.FOLDER
+        else:
+            return DirectoryEntryModel(dirEntry.name, dirEntry.path)
+        stat = dirEntry.stat()
+    except OSError:
+        return DirectoryEntryModel(dirEntry.name, dirEntry.path)
+
+    # same rule as os.path.ismount, a folder on another device than its parent, never a symlink
+    if leafType == LeafType.FOLDER and platform.system() != "Windows" and not dirEntry.is_symlink():
+        if stat.st_dev != parentStat.st_dev or stat.st_ino == parentStat.st_ino:
+            leafType = LeafType.DRIVE
+
+    return DirectoryEntryModel(dirEntry.name, dirEntry.path, leafType, stat.st_size, stat.st_mtime)
+
+
 def countItemsInDirectory(path: str) -> int:
     """
     Counts the number of items in a directory
@@ -0,0 +1,115 @@
+from functools import lru_cache
+
+import numpy as np
+from PySide6.QtCore import QFile
+
+
+def parseObj(text: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    parses the contents of an obj file into indexed triangle arrays.
+    faces with more than three corners are fanned into triangles, missing normals are averaged from the faces
+    :param text:
+    :return: the (positions (V,3) float32, normals (V,3) float32, indices (T*3,) uint32)
+    """
+    positions = []
+    normals = []
+    corners = []
+
+    for line in text.splitlines():
+        if line.startswith("v "):
+            positions.append(line.split()[1:4])
+        elif line.startswith("vn "):
+            normals.append(line.split()[1:4])
+        elif line.startswith("f "):
+            face = []
+            for corner in line.split()[1:]:
+                parts = corner.split("/")
+                vi = int(parts[0])
+                ni = int(parts[2]) if len(parts) > 2 and parts[2] else 0
+                # obj indices are 1-based, negative ones count back from the last vertex
+                vi = vi - 1 if vi > 0 else len(positions) + vi
+                ni = ni - 1 if ni > 0 else (len(normals) + ni if ni < 0 else -1)
+                face.append((vi, ni))
+            for k in range(1, len(face) - 1):
+                corners.extend((face[0], face[k], face[k + 1]))
+
+    positions = np.array(positions, dtype=np.float32).reshape(-1, 3)
+    normals = np.array(normals, dtype=np.float32).reshape(-1, 3)
+
+    # every distinct (position, normal) pair becomes one vertex
+    pairs = np.array(corners, dtype=np.int64).reshape(-1, 2)
+    unique, indices = np.unique(pairs, axis=0, return_inverse=True)
+
+    vertexPositions = positions[unique[:, 0]]
+    if len(normals) and (unique[:, 1] >= 0).all():
+        vertexNormals = normals[unique[:, 1]]
+    else:
+        vertexNormals = faceAveragedNormals(vertexPositions, indices.reshape(-1))
+
+    return vertexPositions, vertexNormals.astype(np.float32), indices.reshape(-1).astype(np.uint32)
+
+
+def faceAveragedNormals(positions: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """
+    computes vertex normals as the normalized sum of the normals of the faces around each vertex
+    :param positions:
+    :param indices:
+    :return:
+    """
+    triangles = positions[indices.reshape(-1, 3)]
+    faceNormals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+
+    normals = np.zeros_like(positions)
+    for k in range(3):
+        np.add.at(normals, indices.reshape(-1, 3)[:, k], faceNormals)
+
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    lengths[lengths == 0] = 1
+    return normals / lengths
+
+
+@lru_cache(maxsize=None)
+def readObj(source: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    reads and parses an obj file, once per source.
+    sources starting with ':' are read from the qrc resources, the others from disk
+    :param source:
+    :return: the (positions, normals, indices) of parseObj
+    """
+    f = QFile(source)
+    if not f.open(QFile.OpenModeFlag.ReadOnly):
+        print(f"Could not read mesh {source}")
+        return parseObj("")
+    text = str(f.readAll(), encoding="utf-8")
+    f.close()
+    return parseObj(text)
+
+
+@lru_cache(maxsize=None)
+def cuboidArrays(size: float = 1.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    arrays of an axis aligned cube centered on the origin with flat faces, the same shape as a default QCuboidMesh
+    :param size: length of the edges
+    :return: the (positions, normals, indices) of parseObj
+    """
+    positions = []
+    normals = []
+    indices = []
+    h = size / 2
+    for axis in range(3):
+        for sign in (-1, 1):
+            normal = np.zeros(3)
+            normal[axis] = sign
+            # two axes spanning the face, ordered so the triangles wind counter clockwise seen from outside
+            u = np.roll(np.eye(3)[axis], 1) * h
+            v = np.roll(np.eye(3)[axis], 2) * h
+            if sign < 0:
+                u, v = v, u
+            base = len(positions)
+            for cu, cv in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+                positions.append(normal * h + cu * u + cv * v)
+                normals.append(normal)
+            indices.extend((base, base + 1, base + 2, base, base + 2, base + 3))
+
+    return (np.array(positions, dtype=np.float32), np.array(normals, dtype=np.float32),
+            np.array(indices, dtype=np.uint32))
@@ -0,0 +1,131 @@
+"""
+builds the pre-decimated level of detail variants of the leaf icon meshes.
+
+    python -m core.utils.mesh_lod
+
+writes <name>_lod1.obj and <name>_lod2.obj next to every mesh of LOD_SOURCES. the variants are committed with the
+other assets and must be listed in assets/resources.qrc, run it again whenever a source mesh changes
+"""
+import os
+
+import numpy as np
+
+from core.utils.mesh_loader import faceAveragedNormals, parseObj
+
+MESHES_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "assets", "meshes")
+
+LOD_SOURCES = ("file_light.obj", "folder_light.obj")
+
+# share of the triangles of the source kept by every level after the first
+LOD_RATIOS = (0.25, 0.06)
+
+
+def lodFileName(source: str, level: int) -> str:
+    """
+    name of the mesh of a level of detail, level 0 is the source itself
+    :param source: file name of the full resolution mesh
+    :param level:
+    :return:
+    """
+    if level == 0:
+        return source
+    stem, extension = os.path.splitext(source)
+    return f"{stem}_lod{level}{extension}"
+
+
+def clusterDecimate(positions: np.ndarray, indices: np.ndarray,
+                    cells: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    simplifies a mesh by vertex clustering: the bounding box is cut in a grid of cells and the vertices of every cell
+    are merged into their mean. triangles that collapse or come out twice are dropped
+    :param positions: (V,3) vertex positions
+    :param indices: (T*3,) triangle indices
+    :param cells: number of cells along the longest side of the bounding box
+    :return: the (positions, normals, indices) of the simplified mesh
+    """
+    lower = positions.min(axis=0)
+    cellSize = max(float((positions.max(axis=0) - lower).max()), 1e-9) / cells
+    keys = np.floor((positions - lower) / cellSize).astype(np.int64)
+    _, cluster = np.unique(keys, axis=0, return_inverse=True)
+    cluster = cluster.reshape(-1)
+
+    count = cluster.max() + 1
+    merged = np.zeros((count, 3), dtype=np.float64)
+    np.add.at(merged, cluster, positions)
+    merged /= np.bincount(cluster, minlength=count)[:, None]
+
+    triangles = cluster[indices.reshape(-1, 3)]
+    collapsed = ((triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2])
+                 | (triangles[:, 0] == triangles[:, 2]))
+    triangles = triangles[~collapsed]
+    # same corners, whatever the order. the first one keeps its winding
+    _, first = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+    triangles = triangles[np.sort(first)]
+
+    # only keep the clusters still used by a triangle
+    used, remapped = np.unique(triangles, return_inverse=True)
+    merged = merged[used].astype(np.float32)
+    indices = remapped.reshape(-1).astype(np.uint32)
+    return merged, faceAveragedNormals(merged, indices).astype(np.float32), indices
+
+
+def decimate(positions: np.ndarray, indices: np.ndarray,
+             ratio: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    simplifies a mesh down to about ratio of its triangles, searching the grid of clusterDecimate
+    :param positions:
+    :param indices:
+    :param ratio: share of the triangles to keep, in (0, 1]
+    :return: the (positions, normals, indices) of the simplified mesh
+    """
+    target = max(1, int(len(indices) // 3 * ratio))
+    low, high = 2, 512
+    best = clusterDecimate(positions, indices, high)
+    while low < high:
+        cells = (low + high) // 2
+        result = clusterDecimate(positions, indices, cells)
+        if len(result[2]) // 3 >= target:
+            best, high = result, cells
+        else:
+            low = cells + 1
+    return best
+
+
+def writeObj(path: str, positions: np.ndarray, normals: np.ndarray, indices: np.ndarray, comment: str = ""):
+    """
+    writes an indexed triangle mesh as an obj file, one normal per vertex
+    :param path:
+    :param positions:
+    :param normals:
+    :param indices:
+    :param comment: written at the top of the file
+    :return:
+    """
+    lines = [f"# {line}" for line in comment.splitlines()]
+    lines.append(f"# Vertices: {len(positions)}")
+    lines.append(f"# Faces: {len(indices) // 3}")
+    for v, n in zip(positions.tolist(), normals.tolist()):
+        lines.append("vn {:.7f} {:.7f} {:.7f}".format(*n))
+        lines.append("v {:.7f} {:.7f} {:.7f}".format(*v))
+    for a, b, c in (indices.reshape(-1, 3) + 1).tolist():
+        lines.append(f"f {a}//{a} {b}//{b} {c}//{c}")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    for source in LOD_SOURCES:
+        with open(os.path.join(MESHES_DIR, source), encoding="utf-8") as f:
+            positions, _, indices = parseObj(f.read())
+
+        for level, ratio in enumerate(LOD_RATIOS, start=1):
+            lod = decimate(positions, indices, ratio)
+            target = lodFileName(source, level)
+            writeObj(os.path.join(MESHES_DIR, target), *lod,
+                     comment=f"level {level} of detail of {source}, built by core/utils/mesh_lod.py")
+            print(f"{target}: {len(lod[2]) // 3} faces, from {len(indices) // 3}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
+import itertools
 import os.path
-import time
 
 from PySide6.QtCore import QDir
 
@@ -14,6 +14,10 @@ class PathManager:
         self.__paths: list[str] = [QDir.rootPath()]
         self.__currentPath: str = QDir.rootPath()
 
+        # ids of the recorded paths, unique however fast they are recorded
+        self.__ids = itertools.count()
+        self.__register(0)
+
     def updatePaths(self, path: str):
 
         if not os.path.exists(path):
@@ -21,14 +25,16 @@ class PathManager:
 
         self.__paths.append(path)
         idx = len(self.__paths) - 1
-        pid = str(time.time())
-
-        self.__id_idx_map.update({pid: idx})
-        self.__idx_id_map.update({idx: pid})
+        self.__register(idx)
 
         self.__currentPath = path
         self.__cIdx = idx
 
+    def __register(self, idx: int):
+        pid = str(next(self.__ids))
+        self.__id_idx_map.update({pid: idx})
+        self.__idx_id_map.update({idx: pid})
+
     def previous(self):
         """
         gets the previous path from a target path
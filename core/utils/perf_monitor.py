@@ -0,0 +1,98 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+
+class PerfMonitor:
+    def __init__(self, smoothing: float = 0.2):
+        """
+        collects the timings of the scene, the tasks and the frames, from any thread.
+        every timer keeps its last sample and a moving average, every value only its last sample. nothing is
+        emitted, whoever shows them reads samples() at their own pace, which is also when the probes are called
+        :param smoothing: weight of a new sample in the moving average
+        """
+        self.__smoothing: float = smoothing
+        self.__lock = threading.Lock()
+        # name -> (last seconds, average seconds, count)
+        self.__timers: dict[str, tuple[float, float, int]] = {}
+        self.__values: dict[str, float] = {}
+        self.__probes: dict[str, Callable[[], float]] = {}
+
+    def record(self, name: str, seconds: float):
+        """
+        adds a sample to a timer
+        :param name:
+        :param seconds:
+        :return:
+        """
+        with self.__lock:
+            _, average, count = self.__timers.get(name, (0.0, seconds, 0))
+            average += (seconds - average) * self.__smoothing
+            self.__timers.update({name: (seconds, average, count + 1)})
+
+    @contextmanager
+    def measure(self, name: str):
+        """
+        records the time spent in a with block under name, exceptions included
+        :param name:
+        :return:
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def setValue(self, name: str, value: float):
+        """
+        sets a value that is not a duration, like a number of entities
+        :param name:
+        :param value:
+        :return:
+        """
+        with self.__lock:
+            self.__values.update({name: value})
+
+    def setProbe(self, name: str, probe: Callable[[], float]):
+        """
+        sets a value that is computed only when read, for values too costly to keep up to date.
+        probes are called by samples(), on the thread reading them
+        :param name:
+        :param probe:
+        :return:
+        """
+        with self.__lock:
+            self.__probes.update({name: probe})
+
+    def timer(self, name: str) -> tuple[float, float, int] | None:
+        """
+        gets a timer
+        :param name:
+        :return: the (last, average, count) of its samples, in seconds. None before its first sample
+        """
+        with self.__lock:
+            return self.__timers.get(name)
+
+    def value(self, name: str) -> float | None:
+        with self.__lock:
+            return self.__values.get(name)
+
+    def samples(self) -> tuple[dict[str, tuple[float, float, int]], dict[str, float]]:
+        """
+        gets a copy of every timer and value, probes included
+        :return: the timers as (last, average, count) in seconds, and the values
+        """
+        with self.__lock:
+            timers, values, probes = dict(self.__timers), dict(self.__values), dict(self.__probes)
+        values.update({name: probe() for name, probe in probes.items()})
+        return timers, values
+
+    def reset(self):
+        with self.__lock:
+            self.__timers.clear()
+            self.__values.clear()
+            self.__probes.clear()
+
+
+perfMonitor = PerfMonitor()
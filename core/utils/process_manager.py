@@ -1,59 +1,182 @@
+import itertools
+import multiprocessing
+import time
 import traceback
-from typing import Any, Callable
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Hashable
 
-from PySide6.QtCore import QObject, QThread, Signal
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool, QTimer, Signal
 
 from core.signal_bus import signalBus
+from core.structs import LaunchPolicy, TaskBackend
+from core.utils.cancellation import CancellationToken, TaskCancelledError
+from core.utils.perf_monitor import perfMonitor
+from core.utils.task_memo import TaskMemo, dependsOn, normalizePath
+from core.utils.task_progress import ProgressReporter
 from models.alert_models import WarningAlertModel, EventAlertModel
 from models.sub_process_item_model import SubProcessItemModel
 
 
-class ProcessThread(QThread, QObject):
-    threadStarted = Signal(str)
-    threadFinished = Signal(str)
+def defaultThreadCount() -> int:
+    """
+    number of worker threads of a process manager when not given, bounded whatever the number of cores
+    :return:
+    """
+    return max(2, min(8, QThread.idealThreadCount()))
+
+
+# seconds between two checks of the cancellation of a task waiting on a worker process
+PROCESS_POLL_INTERVAL = 0.05
+
+# milliseconds a shutdown waits for the running tasks to stop
+SHUTDOWN_TIMEOUT = 500
+
+
+def queuePriority(priority: QThread.Priority) -> int:
+    """
+    position of a task in the queue of the pool, higher runs first. inheriting tasks queue as normal ones
+    :param priority:
+    :return:
+    """
+    if priority == QThread.Priority.InheritPriority:
+        priority = QThread.Priority.NormalPriority
+    return priority.value
+
+
+class ProcessTask(QObject, QRunnable):
+    taskStarted = Signal(str)
+    taskFinished = Signal(str)
+
+    # emitted from the worker thread, relayed on the thread of the task
+    __runStarted = Signal()
+    __runFinished = Signal()
 
     def __init__(self, pid: str, task: Callable[[...], Any] | Callable[[], Any], params: Any = None,
-                 description: str = None, name: str = None):
-        super().__init__()
+                 description: str = None, name: str = None, reportsProgress: bool = False,
+                 progressInterval: float = 0.1, cancellable: bool = False,
+                 priority: QThread.Priority = QThread.Priority.InheritPriority,
+                 executor: futures.Executor = None):
+        """
+        a task waiting for, or running on, a thread of the pool of a process manager.
+        its signals are emitted on the thread it was created on
+        :param executor: when set, the thread hands the task to this executor and waits for its result
+        """
+        QObject.__init__(self)
+        QRunnable.__init__(self)
+        # the manager keeps the task until it is finished or taken back from the queue
+        self.setAutoDelete(False)
 
         self.__result: Any = None
         self.__error: Any = None
         self.__errorOccurred: bool = False
+        self.__cancelled: bool = False
 
         self.__pid = pid
         self.__task: Callable[[...], Any] | Callable[[], Any] = task
         self.__params: Any = params
         self.__description: str = description
         self.__name: str = name
+        self.__reporter: ProgressReporter | None = ProgressReporter(progressInterval) if reportsProgress else None
+        self.__cancellable: bool = cancellable
+        self.__token: CancellationToken = CancellationToken()
+        self.__priority: QThread.Priority = priority
+        self.__thread: QThread | None = None
+        self.__executor: futures.Executor | None = executor
 
         self.__configure()
 
     def __configure(self):
-        self.started.connect(self.__handleThreadStarted)
-        self.finished.connect(self.__handleThreadFinished)
+        self.__runStarted.connect(self.__handleRunStarted)
+        self.__runFinished.connect(self.__handleRunFinished)
 
     # region event handlers
-    def __handleThreadStarted(self):
-        self.threadStarted.emit(self.__pid)
+    def __handleRunStarted(self):
+        self.taskStarted.emit(self.__pid)
 
-    def __handleThreadFinished(self):
-        self.threadFinished.emit(self.__pid)
+    def __handleRunFinished(self):
+        self.taskFinished.emit(self.__pid)
 
     # endregion
 
     # region override
 
     def run(self) -> None:
+        # the thread belongs to the pool, its priority is given back with it
+        self.__thread = QThread.currentThread()
+        previousPriority = self.__thread.priority()
+        if previousPriority == QThread.Priority.InheritPriority:
+            previousPriority = QThread.Priority.NormalPriority
+        if self.__priority != QThread.Priority.InheritPriority:
+            self.__thread.setPriority(self.__priority)
+        self.__runStarted.emit()
+
+        kwargs = {}
+        if self.__reporter is not None:
+            self.__reporter.start()
+            kwargs["progress"] = self.__reporter
+        if self.__cancellable:
+            kwargs["token"] = self.__token
+
+        start = time.perf_counter()
         try:
-            if self.__params is not None:
-                self.__result = self.__task(self.__params)
+            if self.__executor is not None:
+                self.__result = self.__runInExecutor()
+            elif self.__params is not None:
+                self.__result = self.__task(self.__params, **kwargs)
             else:
-                self.__result = self.__task()
+                self.__result = self.__task(**kwargs)
             self.__errorOccurred = False
+        except TaskCancelledError:
+            self.__cancelled = True
         except Exception as e:
             self.__error = e
             self.__errorOccurred = True
             print(traceback.format_exc())
+        finally:
+            perfMonitor.record(f"task {self.__name or self.__pid}", time.perf_counter() - start)
+            thread, self.__thread = self.__thread, None
+            thread.setPriority(previousPriority)
+
+        self.__runFinished.emit()
+
+    # endregion
+
+    # region workers
+
+    def __runInExecutor(self) -> Any:
+        """
+        runs the task in the executor, polling the cancellation token while waiting.
+        a cancelled task that already started is left to finish, its result is dropped
+        :return:
+        """
+        args = () if self.__params is None else (self.__params,)
+        future = self.__executor.submit(self.__task, *args)
+        while True:
+            try:
+                return future.result(timeout=PROCESS_POLL_INTERVAL)
+            except futures.TimeoutError:
+                if self.__token.isCancelled():
+                    future.cancel()
+                    raise TaskCancelledError()
+
+    def cancel(self):
+        """
+        asks the task to stop. cancellable tasks stop at their next check, the others run to completion
+        :return:
+        """
+        self.__token.cancel()
+
+    def setPriority(self, priority: QThread.Priority):
+        """
+        changes the priority of the thread running the task, or of the thread it will run on
+        :param priority:
+        :return:
+        """
+        self.__priority = priority
+        thread = self.__thread
+        if thread is not None and priority != QThread.Priority.InheritPriority:
+            thread.setPriority(priority)
 
     # endregion
 
@@ -62,6 +185,12 @@ class ProcessThread(QThread, QObject):
     def name(self):
         return self.__name
 
+    def cancelled(self):
+        return self.__cancelled or self.__token.isCancelled()
+
+    def token(self):
+        return self.__token
+
     def description(self):
         return self.__description
 
@@ -77,13 +206,56 @@ class ProcessThread(QThread, QObject):
     def pid(self):
         return self.__pid
 
+    def priority(self) -> QThread.Priority:
+        return self.__priority
+
+    def reporter(self) -> ProgressReporter | None:
+        return self.__reporter
+
     # endregion
 
 
 class ProcessManger:
-    def __init__(self):
-        self.__threads: dict[str, ProcessThread] = {}
+    def __init__(self, maxThreads: int = None, maxProcesses: int = None, memoCapacity: int = 128,
+                 memoTtl: float | None = 60.0, progressRate: float = 10.0):
+        """
+        runs the subprocesses on a pool of at most maxThreads threads. the tasks waiting for a thread are queued by
+        priority, the ones of the same priority in launch order.
+        tasks of the PROCESS backend go through the same queue, then run in a pool of worker processes started on
+        first use and reused by the next tasks.
+        subprocesses with a memo key share a single task per key, run under a pid of its own, and their results are
+        kept until they expire or a path they depend on is reported changed through signalBus.onPathChanged.
+        the progress of the tasks is taken from their reporters on the gui thread, at most progressRate times per
+        second, and delivered to their onProgress then to signalBus.onTaskProgress in a single batch
+        @param maxThreads: defaults to the number of cores, between 2 and 8
+        @param maxProcesses: defaults to the number of cores
+        @param memoCapacity: most memoized results kept, the least recently used are dropped first
+        @param memoTtl: seconds a memoized result is reused, None keeps it until a path it depends on changes
+        @param progressRate: most progress deliveries per second
+        """
+        self.__pool = QThreadPool()
+        self.__pool.setMaxThreadCount(maxThreads or defaultThreadCount())
+        self.__maxProcesses: int | None = maxProcesses
+        self.__processPool: futures.ProcessPoolExecutor | None = None
+        self.__threads: dict[str, ProcessTask] = {}
         self.__processModels: dict[str, SubProcessItemModel] = {}
+        # cancelled tasks that are still winding down, kept alive until they finish
+        self.__retiredThreads: list[ProcessTask] = []
+
+        self.__memo = TaskMemo(memoCapacity, memoTtl)
+        # memo key -> the subprocesses waiting on the task of that key, by pid
+        self.__flights: dict[Hashable, dict[str, SubProcessItemModel]] = {}
+        # pid of the task of a memo key -> the key
+        self.__flightKeys: dict[str, Hashable] = {}
+        # keys whose paths changed while their task was running, their results are not memoized
+        self.__staleFlights: set[Hashable] = set()
+        # pid -> the subprocesses served from the memo, until their callbacks run
+        self.__memoHits: dict[str, SubProcessItemModel] = {}
+        self.__flightIds = itertools.count()
+
+        # runs while tasks report progress
+        self.__progressTimer = QTimer()
+        self.__progressTimer.setInterval(max(1, round(1000 / progressRate)))
 
         self.__connectSignals()
 
@@ -94,11 +266,28 @@ class ProcessManger:
 
     def threads(self):
         """
-        gets all the active threads and returns to the user
+        gets all the active tasks, running or queued, and returns to the user
         @return:
         """
         return self.__threads
 
+    def maxThreads(self) -> int:
+        return self.__pool.maxThreadCount()
+
+    def processPool(self) -> futures.ProcessPoolExecutor:
+        """
+        gets the pool of worker processes, starting it on first use
+        @return:
+        """
+        if self.__processPool is None:
+            # spawned rather than forked, a fork of a process running qt threads is not safe
+            self.__processPool = futures.ProcessPoolExecutor(self.__maxProcesses,
+                                                             mp_context=multiprocessing.get_context("spawn"))
+        return self.__processPool
+
+    def memo(self) -> TaskMemo:
+        return self.__memo
+
     def processModels(self):
         """
         gets all the current process models and returns them
@@ -110,43 +299,125 @@ class ProcessManger:
 
     # region - event handlers
     def handleThreadStarted(self, pid: str):
-        p = self.__processModels.get(pid)
-        if p is not None:
+        for p in self.__callers(pid):
             sTask = p.onStart()
             sTask(p.startParams())
 
+    def handleThreadProgress(self, pid: str, value: Any) -> dict[str, Any]:
+        """
+        hands the progress of a task to the subprocesses waiting on it
+        @param pid:
+        @param value:
+        @return: the progress by pid of subprocess
+        """
+        progress = {}
+        for p in self.__callers(pid):
+            progress.update({p.pid(): value})
+            pTask = p.onProgress()
+            pTask(value)
+        return progress
+
+    def handleProgressTimeout(self):
+        """
+        delivers the progress reported by the tasks since the last timeout, the timer stops once none reports
+        @return:
+        """
+        progress = {}
+        reporting = False
+        for pid, thread in list(self.__threads.items()):
+            if thread.reporter() is None or pid not in self.__threads:
+                continue
+            reporting = True
+            found, value = thread.reporter().take()
+            if found:
+                progress.update(self.handleThreadProgress(pid, value))
+
+        if progress:
+            signalBus.onTaskProgress.emit(progress)
+        if not reporting:
+            self.__progressTimer.stop()
+
     def handleThreadFinished(self, pid: str):
-        p = self.__processModels.get(pid)
-        if p is None:
+        callers = self.__callers(pid)
+        if not callers:
             return
 
         thread = self.__threads.get(pid)
         if thread is None:
             return thread
 
-        # if error occurred during execution, handle and return
-        if thread.errorOccurred():
-            eTask = p.onError()
-            eTask(thread.error())
-        else:
-            cTask = p.onComplete()
-            cTask(thread.result())
+        # the last progress of a task is delivered before its result, whatever the rate
+        if not thread.cancelled() and thread.reporter() is not None:
+            found, value = thread.reporter().take(force=True)
+            if found:
+                signalBus.onTaskProgress.emit(self.handleThreadProgress(pid, value))
 
+        key = self.__flightKeys.get(pid)
+        memoize = key is not None and key not in self.__staleFlights and all(p.memoResult() for p in callers)
+        # the pid is free again before the callbacks run, they may launch the next task
         self.purge(pid)
 
+        # if error occurred during execution, handle and return
+        if thread.cancelled():
+            pass
+        elif thread.errorOccurred():
+            # a worker process died, the next process task starts a new pool
+            if isinstance(thread.error(), BrokenProcessPool):
+                self.__processPool = None
+            for p in callers:
+                eTask = p.onError()
+                eTask(thread.error())
+        else:
+            if memoize:
+                # the final progress is kept with the result, for the launches served from the memo
+                progress = None if thread.reporter() is None else thread.reporter().latest()
+                self.__memo.put(key, (thread.result(), progress), [path for p in callers for path in p.memoPaths()])
+            for p in callers:
+                cTask = p.onComplete()
+                cTask(thread.result())
+
         signalBus.onTasksChanged.emit()
         signalBus.onTaskCompleted.emit(thread)
 
+    def handlePathChanged(self, path: str):
+        """
+        drops the memoized results depending on a changed path, and keeps the running tasks depending on it from
+        memoizing theirs
+        @param path:
+        @return:
+        """
+        self.__memo.invalidate(path)
+        path = normalizePath(path)
+        for key, flight in self.__flights.items():
+            paths = tuple(normalizePath(p) for model in flight.values() for p in model.memoPaths())
+            if dependsOn(paths, path):
+                self.__staleFlights.add(key)
+
     # endregion
 
     # region - workers
 
     def kill(self, pid: str):
         """
-        kills the process with target id
+        cancels the process with target id.
+        the task is asked to stop through its cancellation token and detached from the manager, its callbacks
+        are never called and the pid is free to be launched again straight away
+        a subprocess waiting on a memoized task only stops waiting, the task is cancelled with its last waiter
         @param pid:
         @return:
         """
+        if self.__memoHits.pop(pid, None) is not None:
+            return
+
+        key = self.__waitingKey(pid)
+        if key is not None:
+            flight = self.__flights.get(key)
+            flight.pop(pid)
+            if flight:
+                signalBus.onTasksChanged.emit()
+                return
+            pid = self.__flightPid(key)
+
         thread = self.__threads.get(pid)
         if thread is None:
             alert = WarningAlertModel(
@@ -158,38 +429,143 @@ class ProcessManger:
             signalBus.CreateConsoleAlert.emit([alert])
             return
 
-        # we will use return code 1 to show that the process was user terminated
-        thread.terminate()
-        thread.wait(1)
+        thread.cancel()
+        self.purge(pid)
+        # a task still in the queue is simply dropped, a running one is left to stop on its own
+        if not self.__pool.tryTake(thread):
+            self.__retire(thread)
+        signalBus.onTasksChanged.emit()
+
+    def reprioritize(self, pid: str, priority: QThread.Priority):
+        """
+        changes the priority of a process, moving it in the queue if it is still waiting for a thread
+        @param pid:
+        @param priority:
+        @return:
+        """
+        key = self.__waitingKey(pid)
+        if key is not None:
+            pid = self.__flightPid(key)
+
+        thread = self.__threads.get(pid)
+        if thread is None:
+            return
+
+        thread.setPriority(priority)
+        if self.__pool.tryTake(thread):
+            self.__pool.start(thread, queuePriority(priority))
 
     def launch(self, subprocess: SubProcessItemModel, override: bool = False):
         """
         launches a new subprocess.
-        if overridden, it will kill old process with same id and run the new one
+        if overridden, or when its launch policy is SUPERSEDE, it will kill old process with same id and run the new
+        one. the old one is taken out of the queue or cancelled, only the result of the new one reaches the callbacks
         @param subprocess:
-        @param override:
+        @param override: supersedes the active process whatever the launch policy
         @return:
         """
+        key = subprocess.memoKey()
+        flight = self.__flights.get(key) if key is not None else None
+        if flight is not None and subprocess.pid() in flight:
+            # launched again for the same work, it keeps waiting on it with its new callbacks
+            flight.update({subprocess.pid(): subprocess})
+            return
 
-        if override:
+        if override or subprocess.policy() == LaunchPolicy.SUPERSEDE:
             if self.processExists(subprocess):
                 self.kill(subprocess.pid())
         else:
             if self.processExists(subprocess):
                 return self.throwProcessAlreadyRunning(subprocess)
 
+        if key is not None:
+            return self.__launchMemoized(subprocess)
+
         self.__processModels.update({subprocess.pid(): subprocess})
+        self.__start(subprocess.pid(), subprocess)
 
-        thread = ProcessThread(subprocess.pid(), subprocess.task(), subprocess.params(), subprocess.description(),
-                               subprocess.name())
-        thread.threadFinished.connect(self.handleThreadFinished)
-        thread.threadStarted.connect(self.handleThreadStarted)
-        self.__threads.update({subprocess.pid(): thread})
+    def __launchMemoized(self, subprocess: SubProcessItemModel):
+        """
+        hands the memoized result of the key of the subprocess to its callbacks, on the next turn of the event loop.
+        without one, the subprocess waits on the task of its key, started if there is none
+        @param subprocess:
+        @return:
+        """
+        key = subprocess.memoKey()
+        found, memoized = self.__memo.get(key)
+        if found:
+            self.__memoHits.update({subprocess.pid(): subprocess})
+            QTimer.singleShot(0, lambda: self.__deliverMemoized(subprocess, *memoized))
+            return
+
+        flight = self.__flights.get(key)
+        if flight is not None:
+            flight.update({subprocess.pid(): subprocess})
+            return
 
-        thread.start()
+        pid = f"memo:{next(self.__flightIds)}"
+        self.__flights.update({key: {subprocess.pid(): subprocess}})
+        self.__flightKeys.update({pid: key})
+        self.__start(pid, subprocess)
+
+    def __deliverMemoized(self, subprocess: SubProcessItemModel, result: Any, progress: Any):
+        """
+        runs the callbacks of a subprocess served from the memo as a task would, its start, its final progress then
+        its result. nothing is called if it was killed or superseded in the meantime
+        @param subprocess:
+        @param result: the memoized result
+        @param progress: the final progress of the task that computed it, None when it reported none
+        @return:
+        """
+        if self.__memoHits.get(subprocess.pid()) is not subprocess:
+            return
+        self.__memoHits.pop(subprocess.pid())
+
+        sTask = subprocess.onStart()
+        sTask(subprocess.startParams())
+        if progress is not None and subprocess.reportsProgress():
+            pTask = subprocess.onProgress()
+            pTask(progress)
+            signalBus.onTaskProgress.emit({subprocess.pid(): progress})
+        cTask = subprocess.onComplete()
+        cTask(result)
+
+    def __start(self, pid: str, subprocess: SubProcessItemModel):
+        """
+        queues the task of a subprocess under pid
+        @param pid:
+        @param subprocess:
+        @return:
+        """
+        thread = ProcessTask(pid, subprocess.task(), subprocess.params(), subprocess.description(),
+                             subprocess.name(), subprocess.reportsProgress(), subprocess.progressInterval(),
+                             subprocess.cancellable(), subprocess.priority(),
+                             self.processPool() if subprocess.backend() == TaskBackend.PROCESS else None)
+        thread.taskFinished.connect(self.handleThreadFinished)
+        thread.taskStarted.connect(self.handleThreadStarted)
+        self.__threads.update({pid: thread})
+        if thread.reporter() is not None and not self.__progressTimer.isActive():
+            self.__progressTimer.start()
+
+        self.__pool.start(thread, queuePriority(subprocess.priority()))
         signalBus.onTasksChanged.emit()
         signalBus.onTaskCreated.emit(thread)
 
+    def shutdown(self, timeout: int = SHUTDOWN_TIMEOUT):
+        """
+        drops the queued tasks, cancels the running ones and stops the worker processes.
+        cancellable tasks stop at their next check, the others are waited on for at most timeout
+        @param timeout: milliseconds to wait for the running threads
+        @return:
+        """
+        self.__pool.clear()
+        for thread in list(self.__threads.values()) + self.__retiredThreads:
+            thread.cancel()
+        if self.__processPool is not None:
+            self.__processPool.shutdown(wait=False, cancel_futures=True)
+            self.__processPool = None
+        self.__pool.waitForDone(timeout)
+
     def purge(self, pid: str):
         """
         removes the target pid from memory
@@ -198,13 +574,61 @@ class ProcessManger:
         """
         # remove the process
         self.__threads.pop(pid)
-        self.__processModels.pop(pid)
+        self.__processModels.pop(pid, None)
+
+        key = self.__flightKeys.pop(pid, None)
+        if key is not None:
+            self.__flights.pop(key, None)
+            self.__staleFlights.discard(key)
+
+    def __callers(self, pid: str) -> list[SubProcessItemModel]:
+        """
+        gets the subprocesses waiting on the task with target pid
+        @param pid:
+        @return:
+        """
+        key = self.__flightKeys.get(pid)
+        if key is not None:
+            return list(self.__flights.get(key, {}).values())
+        p = self.__processModels.get(pid)
+        return [] if p is None else [p]
+
+    def __waitingKey(self, pid: str) -> Hashable | None:
+        """
+        gets the memo key of the task a subprocess is waiting on
+        @param pid: pid of the subprocess
+        @return: None when it is not waiting on a memoized task
+        """
+        for key, flight in self.__flights.items():
+            if pid in flight:
+                return key
+        return None
+
+    def __flightPid(self, key: Hashable) -> str | None:
+        for pid, k in self.__flightKeys.items():
+            if k == key:
+                return pid
+        return None
+
+    def __retire(self, thread: ProcessTask):
+        """
+        disconnects a cancelled task from the manager and holds on to it until it finishes
+        @param thread:
+        @return:
+        """
+        thread.taskFinished.disconnect(self.handleThreadFinished)
+        thread.taskStarted.disconnect(self.handleThreadStarted)
+
+        self.__retiredThreads.append(thread)
+        thread.taskFinished.connect(lambda _, t=thread: self.__retiredThreads.remove(t))
 
     # endregion
 
     # region - connect signals
     def __connectSignals(self):
         signalBus.CreateSubprocess.connect(self.launch)
+        signalBus.onPathChanged.connect(self.handlePathChanged)
+        self.__progressTimer.timeout.connect(self.handleProgressTimeout)
 
     # endregion
     def processExists(self, subprocess):
@@ -213,7 +637,8 @@ class ProcessManger:
         @param subprocess:
         @return:
         """
-        return subprocess.pid() in list(self.__threads.keys())
+        return subprocess.pid() in list(self.__threads.keys()) or subprocess.pid() in self.__memoHits or \
+            self.__waitingKey(subprocess.pid()) is not None
 
     @staticmethod
     def throwProcessAlreadyRunning(subprocess):
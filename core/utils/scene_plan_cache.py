@@ -0,0 +1,65 @@
+import os
+from collections import OrderedDict
+
+from models.scene_plan import ScenePlan
+
+
+class ScenePlanCache:
+    def __init__(self, capacity: int = 8, maxEntries: int = 50_000):
+        """
+        bounded cache of scene plans prepared ahead of a navigation, the least recently stored plan is dropped first.
+        a plan is only handed out while the modification time of its directory is the one it was listed at
+        :param capacity: most plans kept
+        :param maxEntries: most directory entries kept across all the plans, larger listings are never kept
+        """
+        self.__capacity: int = capacity
+        self.__maxEntries: int = maxEntries
+        self.__plans: OrderedDict[str, ScenePlan] = OrderedDict()
+        self.__entries: int = 0
+
+    def __len__(self):
+        return len(self.__plans)
+
+    def __contains__(self, path: str):
+        return path in self.__plans
+
+    def put(self, plan: ScenePlan):
+        """
+        stores a plan in place of any other of its directory
+        :param plan:
+        :return:
+        """
+        if plan.snapshot.error is not None or len(plan) > self.__maxEntries:
+            return
+
+        self.__drop(plan.path())
+        self.__plans.update({plan.path(): plan})
+        self.__entries += len(plan)
+        while len(self.__plans) > self.__capacity or self.__entries > self.__maxEntries:
+            self.__drop(next(iter(self.__plans)))
+
+    def take(self, path: str) -> ScenePlan | None:
+        """
+        removes the plan of a directory from the cache and returns it, if the directory did not change since
+        :param path:
+        :return:
+        """
+        plan = self.__plans.get(path)
+        if plan is None:
+            return None
+        self.__drop(path)
+
+        try:
+            mtimeNs = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        return plan if mtimeNs == plan.snapshot.mtimeNs else None
+
+    def clear(self):
+        self.__plans.clear()
+        self.__entries = 0
+
+    def __drop(self, path: str):
+        plan = self.__plans.pop(path, None)
+        if plan is not None:
+            self.__entries -= len(plan)
@@ -0,0 +1,304 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from core.utils.cancellation import CancellationToken
+from core.utils.size_walker import scanDirectory
+
+# positions of the fields inside a cached directory record
+MTIME, INODE, FILES, ENTRIES, CHILDREN, TOTAL = range(6)
+
+# directories modified this recently are not cached, a later change within the same mtime tick would go unnoticed
+RACY_WINDOW_NS = 2_000_000_000
+
+CACHE_VERSION = 2
+
+# most directories kept, the least recently used are dropped first
+MAX_RECORDS = 100_000
+
+
+def defaultCachePath() -> str:
+    """
+    gets the location of the size cache file in the user's data directory
+    :return:
+    """
+    base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    return os.path.join(base, ".file_world", "size_cache.json")
+
+
+def childPath(path: str, name: str) -> str:
+    """
+    joins a directory and the name of one of its entries, cheaper than os.path.join for normalized paths
+    :param path:
+    :param name:
+    :return:
+    """
+    return path + name if path.endswith(os.sep) else path + os.sep + name
+
+
+class DirectorySizeCache:
+    def __init__(self, cachePath: str = None, maxRecords: int = MAX_RECORDS):
+        """
+        persistent cache of directory sizes.
+        every directory is stored with its mtime and inode, the size of the files directly inside it, the names
+        of its sub directories and the total size of its tree. only directories whose mtime or inode changed are
+        listed again, and the total of a directory whose whole tree is unchanged is reused as is.
+        the lock only guards the records, several walks run at the same time. the cache file is written at exit,
+        when the records changed
+        :param cachePath: the json file the cache is persisted to
+        :param maxRecords: most directories kept, the least recently used are dropped first
+        """
+        self.__cachePath: str = cachePath or defaultCachePath()
+        self.__records: OrderedDict[str, list] = OrderedDict()
+        self.__maxRecords: int = maxRecords
+        self.__lock = threading.RLock()
+        self.__saveLock = threading.Lock()
+        self.__loaded: bool = False
+        self.__dirty: bool = False
+
+        atexit.register(self.flush)
+
+    # region getters
+
+    def cachePath(self):
+        return self.__cachePath
+
+    def records(self):
+        return self.__records
+
+    # endregion
+
+    # region workers
+
+    def size(self, directoryPath: str, onProgress: Callable[[int, int], Any] = None,
+             token: CancellationToken = None) -> int:
+        """
+        computes the total size of the directory, reusing every unchanged sub directory from the cache.
+        directories listed before a cancellation stay cached
+        :param directoryPath:
+        :param onProgress: called with the (bytes, entries) scanned so far
+        :param token: stops the walk with TaskCancelledError once cancelled
+        :return: total size in bytes
+        """
+        self.load()
+        return self.__walk(self.normalize(directoryPath), onProgress, token)
+
+    def invalidate(self, path: str):
+        """
+        drops the cached records of the path and everything below it
+        :param path:
+        :return:
+        """
+        with self.__lock:
+            self.__drop(self.normalize(path))
+
+    def clear(self):
+        """
+        empties the cache, in memory and on disk
+        :return:
+        """
+        with self.__lock:
+            self.__records.clear()
+            self.__dirty = True
+        self.save()
+
+    def load(self):
+        """
+        reads the persisted cache from disk. done once, on first use
+        :return:
+        """
+        with self.__lock:
+            if self.__loaded:
+                return
+            self.__loaded = True
+
+            try:
+                with open(self.__cachePath, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                # a missing or unreadable cache is started over
+                return
+
+            if data.get("version") != CACHE_VERSION:
+                return
+            # the file is written least recently used first
+            self.__records = OrderedDict(data.get("records", {}))
+            self.__evict()
+
+    def flush(self):
+        """
+        writes the cache to disk if it changed since the last write
+        :return:
+        """
+        if self.__dirty:
+            self.save()
+
+    def save(self):
+        """
+        writes the cache to disk. the file is replaced atomically so a crash never leaves a half written cache.
+        the records are copied under the lock and written outside of it
+        :return:
+        """
+        with self.__saveLock:
+            with self.__lock:
+                records = dict(self.__records)
+                self.__dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.__cachePath), exist_ok=True)
+                tmp = f"{self.__cachePath}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"version": CACHE_VERSION, "records": records}, f, separators=(",", ":"))
+                os.replace(tmp, self.__cachePath)
+            except OSError as e:
+                self.__dirty = True
+                print("Could not write size cache", e)
+
+    # endregion
+
+    # region helpers
+
+    @staticmethod
+    def normalize(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def __walk(self, root: str, onProgress: Callable[[int, int], Any] = None,
+               token: CancellationToken = None) -> int:
+        """
+        visits the tree below root depth first, summing every directory once all its sub directories are done
+        :param root:
+        :param onProgress:
+        :param token:
+        :return:
+        """
+        scanned = [0, 0]
+        # directories modified after this are listed but not cached
+        racyAfter = time.time_ns() - RACY_WINDOW_NS
+        top = self.__enter(root, racyAfter, scanned, onProgress, token)
+        if top is None:
+            return 0
+
+        # frames of [record, sub directory paths, next sub directory, their summed totals, tree unchanged]
+        stack = [top]
+        total = 0
+        while stack:
+            frame = stack[-1]
+            children, index = frame[1], frame[2]
+            if index < len(children):
+                frame[2] = index + 1
+                child = self.__enter(children[index], racyAfter, scanned, onProgress, token)
+                if child is None:
+                    frame[4] = False
+                else:
+                    stack.append(child)
+                continue
+
+            stack.pop()
+            record = frame[0]
+            if frame[4]:
+                total = record[TOTAL]
+            else:
+                total = record[FILES] + frame[3]
+                if record[TOTAL] != total:
+                    record[TOTAL] = total
+                    self.__dirty = True
+            if stack:
+                parent = stack[-1]
+                parent[3] += total
+                if not frame[4]:
+                    parent[4] = False
+        return total
+
+    def __enter(self, path: str, racyAfter: int, scanned: list[int], onProgress: Callable[[int, int], Any] = None,
+                token: CancellationToken = None) -> list | None:
+        """
+        starts the visit of a directory
+        :param path:
+        :param racyAfter: mtime in ns past which a listing is too recent to be cached
+        :param scanned: the (bytes, entries) scanned so far, updated
+        :param onProgress:
+        :param token:
+        :return: the frame of the directory, None when it cannot be read
+        """
+        if token is not None:
+            token.raiseIfCancelled()
+        found = self.__record(path, racyAfter)
+        if found is None:
+            return None
+
+        record, unchanged = found
+        scanned[0] += record[FILES]
+        scanned[1] += record[ENTRIES]
+        if onProgress is not None:
+            onProgress(scanned[0], scanned[1])
+        prefix = path if path.endswith(os.sep) else path + os.sep
+        return [record, [prefix + name for name in record[CHILDREN]], 0, 0, unchanged]
+
+    def __record(self, path: str, racyAfter: int) -> tuple[list, bool] | None:
+        """
+        gets the record of a single directory, listing it only when the cached one is stale
+        :param path:
+        :param racyAfter: mtime in ns past which a listing is too recent to be cached
+        :return: the record and whether it was cached and unchanged, None if the directory cannot be read
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self.__lock:
+            cached = self.__records.get(path)
+            if cached is not None and cached[MTIME] == stat.st_mtime_ns and cached[INODE] == stat.st_ino:
+                self.__records.move_to_end(path)
+                return cached, True
+
+        try:
+            filesBytes, entries, children = scanDirectory(path)
+        except (PermissionError, FileNotFoundError):
+            return None
+
+        record = [stat.st_mtime_ns, stat.st_ino, filesBytes, entries, children, 0]
+        with self.__lock:
+            # sub directories that disappeared take their records with them
+            if cached is not None:
+                for name in set(cached[CHILDREN]).difference(children):
+                    self.__drop(childPath(path, name))
+
+            if stat.st_mtime_ns < racyAfter:
+                self.__records[path] = record
+                if cached is not None:
+                    self.__records.move_to_end(path)
+                self.__dirty = True
+                if len(self.__records) > self.__maxRecords:
+                    self.__evict()
+        return record, False
+
+    def __drop(self, path: str):
+        """
+        drops the record of path and of the sub directories it lists, recursively.
+        records below a directory that was never cached are left to the lru, their mtime keeps them from being reused
+        once stale
+        :param path:
+        :return:
+        """
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            record = self.__records.pop(current, None)
+            if record is None:
+                continue
+            self.__dirty = True
+            stack.extend(childPath(current, name) for name in record[CHILDREN])
+
+    def __evict(self):
+        while len(self.__records) > self.__maxRecords:
+            self.__records.popitem(last=False)
+            self.__dirty = True
+
+    # endregion
+
+
+directorySizeCache = DirectorySizeCache()
@@ -0,0 +1,214 @@
+import os
+import threading
+from collections import deque
+from typing import Any, Callable
+
+from core.utils.cancellation import CancellationToken
+
+
+def defaultWorkerCount() -> int:
+    """
+    number of walker threads used when none is configured. listing directories is I/O bound, so this is allowed
+    to exceed the number of cores
+    :return:
+    """
+    return min(16, (os.cpu_count() or 1) * 2)
+
+
+def scanDirectory(path: str) -> tuple[int, int, list[str]]:
+    """
+    lists a single directory without descending into it.
+    sizes of non directory entries are summed, sub directories are returned by name
+    :param path:
+    :return: the (bytes of the files, number of entries, names of the sub directories)
+    """
+    filesBytes = 0
+    entries = 0
+    children = []
+
+    with os.scandir(path) as it:
+        for entry in it:
+            entries += 1
+            if entry.is_dir(follow_symlinks=False):
+                children.append(entry.name)
+            else:
+                filesBytes += entry.stat(follow_symlinks=False).st_size
+
+    return filesBytes, entries, children
+
+
+def visitDirectory(path: str) -> tuple[int, int, list[str]] | None:
+    """
+    default visitor of the walker, lists the directory straight from disk
+    :param path:
+    :return: the (bytes of the files, number of entries, paths of the sub directories), None if the directory cannot
+        be read
+    """
+    try:
+        filesBytes, entries, children = scanDirectory(path)
+    except (PermissionError, FileNotFoundError):
+        return None
+    return filesBytes, entries, [os.path.join(path, name) for name in children]
+
+
+class ParallelSizeWalker:
+    def __init__(self, workers: int = None):
+        """
+        walks a directory tree with a pool of threads. every directory is a work item, a thread pushes the sub
+        directories it finds onto its own queue and, once that runs dry, steals from the other threads' queues.
+        :param workers: number of threads, defaults to defaultWorkerCount()
+        """
+        self.__workers: int = max(1, workers or defaultWorkerCount())
+
+    def workers(self):
+        return self.__workers
+
+    def size(self, directoryPath: str, onProgress: Callable[[int, int], Any] = None,
+             token: CancellationToken = None) -> int:
+        """
+        total size of the directory in bytes, same result as get_directory_size(use_cache=False)
+        :param directoryPath:
+        :param onProgress: called with the (bytes, entries) scanned so far
+        :param token: stops the walk with TaskCancelledError once cancelled
+        :return:
+        """
+        if not os.path.isdir(directoryPath):
+            return os.path.getsize(directoryPath)
+        if self.__workers == 1:
+            return self.__sizeSequential(directoryPath, onProgress, token)
+        return self.walk(directoryPath, visitDirectory, onProgress, token)
+
+    def walk(self, root: str, visit: Callable[[str], tuple[int, int, list[str]] | None],
+             onProgress: Callable[[int, int], Any] = None, token: CancellationToken = None) -> int:
+        """
+        calls visit on every directory below root (root included) and sums the bytes it reports.
+        visit may be called from several threads at once. onProgress is called from any of them but one at a time,
+        with totals that never go backwards
+        :param root:
+        :param visit: (path) => (bytes, entries, sub directory paths) or None to skip the directory
+        :param onProgress: called with the (bytes, entries) scanned so far after every directory
+        :param token: checked before every directory, the walk raises TaskCancelledError once it is cancelled
+        :return: the summed bytes
+        """
+        if self.__workers == 1:
+            return self.__walkSequential(root, visit, onProgress, token)
+
+        queues = [deque() for _ in range(self.__workers)]
+        totals = [0] * self.__workers
+        errors = []
+        pending = [1]
+        condition = threading.Condition()
+        # running (bytes, entries) of all threads, summed and published under one lock so they only grow
+        progress = [0, 0]
+        progressLock = threading.Lock()
+        queues[0].append(root)
+
+        def take(index: int):
+            try:
+                return queues[index].pop()
+            except IndexError:
+                pass
+            # own queue is empty, steal the oldest (largest) item of another thread
+            for offset in range(1, self.__workers):
+                try:
+                    return queues[(index + offset) % self.__workers].popleft()
+                except IndexError:
+                    continue
+            return None
+
+        def work(index: int):
+            while True:
+                path = take(index)
+                if path is None:
+                    with condition:
+                        while pending[0] > 0 and not errors and not any(queues):
+                            condition.wait()
+                        if pending[0] == 0 or errors:
+                            return
+                    continue
+
+                try:
+                    if token is not None:
+                        token.raiseIfCancelled()
+                    result = visit(path)
+                except Exception as e:
+                    with condition:
+                        errors.append(e)
+                        condition.notify_all()
+                    return
+
+                children = []
+                if result is not None:
+                    totals[index] += result[0]
+                    children = result[2]
+                    queues[index].extend(children)
+                    if onProgress is not None:
+                        with progressLock:
+                            progress[0] += result[0]
+                            progress[1] += result[1]
+                            onProgress(progress[0], progress[1])
+
+                with condition:
+                    pending[0] += len(children) - 1
+                    if children or pending[0] == 0:
+                        condition.notify_all()
+
+        threads = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(self.__workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return sum(totals)
+
+    @staticmethod
+    def __sizeSequential(root: str, onProgress: Callable[[int, int], Any] = None,
+                         token: CancellationToken = None) -> int:
+        """
+        sums the tree on the calling thread, as plain as the recursive scandir loop it replaces. unreadable
+        directories are skipped
+        :param root:
+        :param onProgress:
+        :param token:
+        :return:
+        """
+        total = 0
+        count = 0
+        stack = [root]
+        while stack:
+            if token is not None:
+                token.raiseIfCancelled()
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        count += 1
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+            except (PermissionError, FileNotFoundError):
+                continue
+            if onProgress is not None:
+                onProgress(total, count)
+        return total
+
+    @staticmethod
+    def __walkSequential(root: str, visit: Callable[[str], tuple[int, int, list[str]] | None],
+                         onProgress: Callable[[int, int], Any] = None, token: CancellationToken = None) -> int:
+        total = 0
+        count = 0
+        stack = [root]
+        while stack:
+            if token is not None:
+                token.raiseIfCancelled()
+            result = visit(stack.pop())
+            if result is None:
+                continue
+            total += result[0]
+            count += result[1]
+            stack.extend(result[2])
+            if onProgress is not None:
+                onProgress(total, count)
+        return total
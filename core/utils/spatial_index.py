@@ -0,0 +1,149 @@
+import numpy as np
+
+
+def frustumPlanes(viewProjection: np.ndarray) -> np.ndarray:
+    """
+    extracts the six planes of a view frustum from its view projection matrix
+    :param viewProjection: (4,4) row major matrix, projection times view
+    :return: (6,4) planes (a, b, c, d) with unit normals pointing inside, a point p is inside a plane when
+        a*x + b*y + c*z + d >= 0
+    """
+    m = np.asarray(viewProjection, dtype=np.float64).reshape(4, 4)
+    planes = np.array([
+        m[3] + m[0],  # left
+        m[3] - m[0],  # right
+        m[3] + m[1],  # bottom
+        m[3] - m[1],  # top
+        m[3] + m[2],  # near
+        m[3] - m[2],  # far
+    ])
+    lengths = np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    lengths[lengths == 0] = 1
+    return planes / lengths
+
+
+class SpatialGrid:
+    def __init__(self, positions: np.ndarray, cellSize: float = None):
+        """
+        uniform grid over a fixed set of points, answering which of them are inside a frustum and which are the
+        nearest to a point without testing them all
+        :param positions: (N,3) positions of the points, not copied
+        :param cellSize: edge of the cells, chosen to hold about eight points each when omitted
+        """
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        n = len(self.positions)
+
+        self.__lower = self.positions.min(axis=0) if n else np.zeros(3)
+        extent = float((self.positions.max(axis=0) - self.__lower).max()) if n else 0.0
+        if cellSize is None:
+            cellSize = extent / max(1.0, np.cbrt(n / 8))
+        self.__cellSize = max(cellSize, 1e-9)
+
+        # points sorted by cell, every cell being a contiguous run of the sorted order
+        keys = np.floor((self.positions - self.__lower) / self.__cellSize).astype(np.int64)
+        shape = keys.max(axis=0) + 1 if n else np.ones(3, dtype=np.int64)
+        linear, cellOfPoint = np.unique(np.ravel_multi_index(keys.T, shape), return_inverse=True)
+        cells = np.stack(np.unravel_index(linear, shape), axis=1)
+        cellOfPoint = cellOfPoint.reshape(-1)
+        self.__order = np.argsort(cellOfPoint, kind="stable")
+        counts = np.bincount(cellOfPoint, minlength=len(cells))
+        self.__starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+        self.__counts = counts
+        self.__cellMin = self.__lower + cells * self.__cellSize
+        self.__cellMax = self.__cellMin + self.__cellSize
+
+    def __len__(self):
+        return len(self.positions)
+
+    def queryFrustum(self, planes: np.ndarray, margin: float = 0.0) -> np.ndarray:
+        """
+        finds the points inside a frustum
+        :param planes: (6,4) planes of frustumPlanes
+        :param margin: how far outside the planes a point may be and still count, for the size of what is drawn
+            around it
+        :return: indices of the points, in no particular order
+        """
+        if len(self.positions) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        normals = planes[:, :3]
+        # corner of every cell the furthest along each normal, the cell is out when that corner is out of a plane
+        furthest = np.where(normals[None, :, :] >= 0, self.__cellMax[:, None, :], self.__cellMin[:, None, :])
+        distances = np.einsum("cpk,pk->cp", furthest, normals) + planes[:, 3]
+        cells = np.nonzero((distances >= -margin).all(axis=1))[0]
+        if len(cells) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        candidates = np.concatenate([self.__order[s:s + c]
+                                     for s, c in zip(self.__starts[cells].tolist(), self.__counts[cells].tolist())])
+        inside = ((self.positions[candidates] @ normals.T + planes[:, 3]) >= -margin).all(axis=1)
+        return candidates[inside]
+
+    def nearest(self, point: np.ndarray, k: int, candidates: np.ndarray = None) -> np.ndarray:
+        """
+        finds the k points the nearest to point
+        :param point: (3,) position
+        :param k:
+        :param candidates: indices to choose from, all the points when omitted
+        :return: indices of the points, nearest first
+        """
+        if candidates is None:
+            candidates = np.arange(len(self.positions))
+        if len(candidates) <= k:
+            chosen = candidates
+        else:
+            distances = np.linalg.norm(self.positions[candidates] - point, axis=1)
+            chosen = candidates[np.argpartition(distances, k)[:k]]
+
+        distances = np.linalg.norm(self.positions[chosen] - point, axis=1)
+        return chosen[np.argsort(distances, kind="stable")]
+
+    def raycast(self, origin: np.ndarray, direction: np.ndarray, radius: float) -> tuple[int, float] | None:
+        """
+        finds the first of the spheres centred on the points that a ray goes through
+        :param origin: (3,) start of the ray
+        :param direction: (3,) direction of the ray, not necessarily normalized
+        :param radius: radius of the spheres
+        :return: the index of the point and the distance from origin to where the ray enters its sphere, None when
+            the ray misses them all
+        """
+        if len(self.positions) == 0:
+            return None
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        direction = direction / np.linalg.norm(direction)
+
+        # cells whose box, grown by the radius, the ray crosses. slab test against all of them at once
+        lower = self.__cellMin - radius
+        upper = self.__cellMax + radius
+        parallel = direction == 0
+        step = np.where(parallel, 1.0, direction)
+        t1 = (lower - origin) / step
+        t2 = (upper - origin) / step
+        within = (origin >= lower) & (origin <= upper)
+        near = np.where(parallel, np.where(within, -np.inf, np.inf), np.minimum(t1, t2)).max(axis=1)
+        far = np.where(parallel, np.where(within, np.inf, -np.inf), np.maximum(t1, t2)).min(axis=1)
+        cells = np.nonzero(far >= np.maximum(near, 0))[0]
+        if len(cells) == 0:
+            return None
+
+        candidates = np.concatenate([self.__order[s:s + c]
+                                     for s, c in zip(self.__starts[cells].tolist(), self.__counts[cells].tolist())])
+        toCenter = self.positions[candidates] - origin
+        along = toCenter @ direction
+        offset = np.sum(toCenter * toCenter, axis=1) - along * along
+        crossed = offset <= radius * radius
+        if not crossed.any():
+            return None
+
+        candidates = candidates[crossed]
+        half = np.sqrt(radius * radius - offset[crossed])
+        entry = along[crossed] - half
+        # a ray starting inside a sphere leaves it in front of the origin
+        entry = np.where(entry < 0, along[crossed] + half, entry)
+        ahead = entry >= 0
+        if not ahead.any():
+            return None
+
+        first = np.argmin(np.where(ahead, entry, np.inf))
+        return int(candidates[first]), float(entry[first])
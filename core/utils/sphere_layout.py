@@ -0,0 +1,35 @@
+from functools import lru_cache
+
+import numpy as np
+
+# golden angle, the turn between two consecutive points of the spiral
+GOLDEN_ANGLE = np.pi * (3. - np.sqrt(5.))
+
+
+def fibonacciSphere(n: int, radius: float) -> np.ndarray:
+    """
+    positions of n points spread over a sphere along a fibonacci spiral, from the top (y = radius) down.
+    the arrays are cached per (n, radius) and shared, they are read only
+    :param n: number of points
+    :param radius: radius of the sphere
+    :return: (n,3) float64 array of x, y, z
+    """
+    return _fibonacciSphere(int(n), float(radius))
+
+
+@lru_cache(maxsize=32)
+def _fibonacciSphere(n: int, radius: float) -> np.ndarray:
+    i = np.arange(n, dtype=np.float64)
+
+    y = 1 - (i / max(n, 1)) * 2  # y goes from 1 to -1
+    radiusSlice = np.sqrt(1 - y * y)  # radius at y
+    theta = GOLDEN_ANGLE * i
+
+    positions = np.empty((n, 3), dtype=np.float64)
+    positions[:, 0] = np.cos(theta) * radiusSlice
+    positions[:, 1] = y
+    positions[:, 2] = np.sin(theta) * radiusSlice
+    positions *= radius
+
+    positions.setflags(write=False)
+    return positions
@@ -0,0 +1,92 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+def normalizePath(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def dependsOn(paths: tuple[str, ...], path: str) -> bool:
+    """
+    checks if something computed from paths is affected by a change of path
+    :param paths: normalized paths
+    :param path: the normalized changed path
+    :return: True when path is one of them or inside one of them
+    """
+    return any(path == p or path.startswith(p.rstrip(os.sep) + os.sep) for p in paths)
+
+
+def modificationTime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class TaskMemo:
+    def __init__(self, capacity: int = 128, ttl: float = 60.0):
+        """
+        results of memoized tasks by key, the least recently used dropped first.
+        a result expires ttl seconds after it was stored, or as soon as one of the paths it was computed from is
+        reported changed or has another modification time than when it was stored. the modification time of a
+        directory only follows its own entries, results depending on deeper changes should not be kept
+        :param capacity: most results kept
+        :param ttl: seconds a result stays valid, None keeps it until it is invalidated
+        """
+        self.__capacity: int = capacity
+        self.__ttl: float | None = ttl
+        # key -> (result, stored at, normalized paths, their modification times)
+        self.__results: OrderedDict[Hashable, tuple[Any, float, tuple[str, ...], tuple[int | None, ...]]] = \
+            OrderedDict()
+
+    def __len__(self):
+        return len(self.__results)
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        gets the result stored under key
+        :param key:
+        :return: whether there is a valid result, and the result
+        """
+        record = self.__results.get(key)
+        if record is None:
+            return False, None
+
+        result, storedAt, paths, mtimes = record
+        if (self.__ttl is not None and time.monotonic() - storedAt > self.__ttl) or \
+                tuple(modificationTime(p) for p in paths) != mtimes:
+            self.__results.pop(key)
+            return False, None
+
+        self.__results.move_to_end(key)
+        return True, result
+
+    def put(self, key: Hashable, result: Any, paths: list[str] = None):
+        """
+        stores the result of a task
+        :param key:
+        :param result:
+        :param paths: the files or directories the result was computed from
+        :return:
+        """
+        self.__results.pop(key, None)
+        paths = tuple(normalizePath(p) for p in paths or ())
+        self.__results.update({key: (result, time.monotonic(), paths, tuple(modificationTime(p) for p in paths))})
+        while len(self.__results) > self.__capacity:
+            self.__results.popitem(last=False)
+
+    def invalidate(self, path: str):
+        """
+        drops the results computed from path or from a directory containing it
+        :param path: the changed file or directory
+        :return:
+        """
+        path = normalizePath(path)
+        stale = [key for key, (_, _, paths, _) in self.__results.items() if dependsOn(paths, path)]
+        for key in stale:
+            self.__results.pop(key)
+
+    def clear(self):
+        self.__results.clear()
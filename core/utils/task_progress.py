@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Any
+
+from models.task_progress_model import TaskProgress
+
+
+class ProgressReporter:
+    def __init__(self, interval: float = 0.1):
+        """
+        holds the progress of a task between its worker thread and the gui thread.
+        the task updates it as often as it likes, nothing is emitted from its thread. the process manager takes the
+        latest state from the gui thread at its own pace, at most once per interval, so updates in between are
+        batched into one whatever their number.
+        tasks count with advance() or update(), which are delivered as a TaskProgress, or report() any other value
+        :param interval: minimum seconds between two values taken
+        """
+        self.__interval: float = interval
+        self.__lock = threading.Lock()
+        self.__start: float = time.monotonic()
+        self.__lastTake: float = 0.0
+
+        self.__items: int = 0
+        self.__bytes: int = 0
+        self.__total: int | None = None
+        self.__value: Any = None
+        self.__counted: bool = False
+        self.__changed: bool = False
+
+    # region workers
+
+    def start(self):
+        """
+        marks the moment the task starts running, the elapsed time of its progress counts from there rather than from
+        when it was queued
+        :return:
+        """
+        with self.__lock:
+            self.__start = time.monotonic()
+
+    def advance(self, items: int = 0, nbytes: int = 0):
+        """
+        adds to the items and bytes processed. safe to call from any thread
+        :param items:
+        :param nbytes:
+        :return:
+        """
+        with self.__lock:
+            self.__items += items
+            self.__bytes += nbytes
+            self.__counted = self.__changed = True
+
+    def update(self, items: int = None, nbytes: int = None, total: int = None):
+        """
+        sets the items and bytes processed, and the total of items when known. safe to call from any thread
+        :param items:
+        :param nbytes:
+        :param total:
+        :return:
+        """
+        with self.__lock:
+            if items is not None:
+                self.__items = items
+            if nbytes is not None:
+                self.__bytes = nbytes
+            if total is not None:
+                self.__total = total
+            self.__counted = self.__changed = True
+
+    def setTotal(self, total: int | None):
+        with self.__lock:
+            self.__total = total
+            self.__counted = self.__changed = True
+
+    def report(self, value: Any):
+        """
+        reports a progress that is not counted in items and bytes, only the latest one is delivered.
+        safe to call from any thread
+        :param value:
+        :return:
+        """
+        with self.__lock:
+            self.__value = value
+            self.__counted = False
+            self.__changed = True
+
+    def take(self, force: bool = False) -> tuple[bool, Any]:
+        """
+        takes the progress reported since the last take
+        :param force: ignores the interval, to deliver the final state of a task
+        :return: whether there is anything new, and the TaskProgress or the reported value
+        """
+        now = time.monotonic()
+        with self.__lock:
+            if not self.__changed or (not force and now - self.__lastTake < self.__interval):
+                return False, None
+            self.__lastTake = now
+            self.__changed = False
+            if not self.__counted:
+                return True, self.__value
+            return True, TaskProgress(self.__items, self.__bytes, self.__total, now - self.__start)
+
+    def latest(self) -> Any:
+        """
+        gets the latest progress whether it was taken already or not, the final progress of a finished task
+        :return: the TaskProgress or the reported value, None when nothing was reported
+        """
+        with self.__lock:
+            if not self.__counted:
+                return self.__value
+            return TaskProgress(self.__items, self.__bytes, self.__total, time.monotonic() - self.__start)
+
+    # endregion
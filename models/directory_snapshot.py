@@ -0,0 +1,70 @@
+import time
+
+from core.structs import LeafType
+
+
+class DirectoryEntryModel:
+    def __init__(self, name: str, path: str, leafType: LeafType = LeafType.UNSET, size: int = 0,
+                 mtime: float = None):
+        """
+        one item of a directory listing
+        :param name: the name of the item inside its directory
+        :param path: the full path of the item
+        :param leafType: file, folder, drive or unset
+        :param size: size in bytes, as reported by stat. not the size of a folder's contents
+        :param mtime: modification time, seconds since the epoch
+        """
+        self.name: str = name
+        self.path: str = path
+        self.leafType: LeafType = leafType
+        self.size: int = size
+        self.mtime: float | None = mtime
+
+    def isFile(self) -> bool:
+        return self.leafType == LeafType.FILE
+
+    def isFolder(self) -> bool:
+        return self.leafType == LeafType.FOLDER
+
+    def isDirectory(self) -> bool:
+        return self.leafType in (LeafType.FOLDER, LeafType.DRIVE)
+
+
+class DirectorySnapshot:
+    def __init__(self, path: str, entries: list[DirectoryEntryModel] = None, mtimeNs: int = None,
+                 error: Exception = None):
+        """
+        the listing of a directory taken at one point in time. built once per navigation and shared by the scene,
+        the status bar and the properties panel
+        :param path: the listed directory
+        :param entries: the items of the directory, in listing order
+        :param mtimeNs: modification time of the directory when it was listed, in nanoseconds
+        :param error: the error that prevented the listing, if any
+        """
+        self.path: str = path
+        self.entries: list[DirectoryEntryModel] = entries or []
+        self.mtimeNs: int | None = mtimeNs
+        self.error: Exception | None = error
+        self.createdAt: float = time.monotonic()
+
+        self.__byPath: dict[str, DirectoryEntryModel] = {e.path: e for e in self.entries}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def count(self) -> int:
+        return len(self.entries)
+
+    def names(self) -> list[str]:
+        return [e.name for e in self.entries]
+
+    def entry(self, path: str) -> DirectoryEntryModel | None:
+        """
+        gets the entry with the given path, None if it is not part of the snapshot
+        :param path:
+        :return:
+        """
+        return self.__byPath.get(path)
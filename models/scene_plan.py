@@ -0,0 +1,24 @@
+import numpy as np
+
+from models.directory_snapshot import DirectorySnapshot
+from models.tree_leaf_model import TreeLeafModel
+
+
+class ScenePlan:
+    def __init__(self, snapshot: DirectorySnapshot, models: list[TreeLeafModel] = None, layout: np.ndarray = None):
+        """
+        everything the scene needs to show a directory that can be prepared away from the gui thread. only the
+        entities are left to create
+        :param snapshot: the listing of the directory
+        :param models: the leaf model of every entry, in the order of the snapshot
+        :param layout: (N,3) position of every entry, in the order of the snapshot
+        """
+        self.snapshot: DirectorySnapshot = snapshot
+        self.models: list[TreeLeafModel] = models or []
+        self.layout: np.ndarray = layout if layout is not None else np.zeros((0, 3))
+
+    def __len__(self):
+        return len(self.models)
+
+    def path(self) -> str:
+        return self.snapshot.path
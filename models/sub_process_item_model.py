@@ -1,4 +1,8 @@
-from typing import Callable, Any
+from typing import Callable, Any, Hashable
+
+from PySide6.QtCore import QThread
+
+from core.structs import LaunchPolicy, TaskBackend
 
 
 class SubProcessItemModel:
@@ -10,6 +14,15 @@ class SubProcessItemModel:
                  onStartParams: Any = None,
                  onErrorParams: Any = None,
                  onCompleteParams: Any = None,
+                 onProgress: Callable[..., Any] = None,
+                 progressInterval: float = 0.1,
+                 cancellable: bool = False,
+                 priority: QThread.Priority = QThread.Priority.InheritPriority,
+                 policy: LaunchPolicy = LaunchPolicy.REJECT,
+                 backend: TaskBackend = TaskBackend.THREAD,
+                 memoKey: Hashable = None,
+                 memoPaths: list[str] = None,
+                 memoResult: bool = True,
                  ):
         """
         model for creating subprocesses.
@@ -21,6 +34,31 @@ class SubProcessItemModel:
         @param onStart: action to be done when the task begins execution, ()=>Any
         @param description: the description of the process.
         @param name: short name of the process
+        @param onProgress: action to be done with the progress reported by the task, (value)=>Any.
+            when set, the task is called with a `progress` keyword argument, a ProgressReporter. the value is a
+            TaskProgress when the task counts its items and bytes, or the last value it reported
+        @param progressInterval: minimum seconds between two progress updates, on top of the rate of the process
+            manager
+        @param cancellable: when set, the task is called with a `token` keyword argument, a CancellationToken it
+            is expected to check regularly
+        @param priority: tasks of higher priority leave the queue of the process manager first and their thread
+            runs at that priority. lower it for work nobody is waiting on yet
+        @param policy: what launching the task does while another with the same pid is active. REJECT keeps the
+            older one and drops this one with an alert, SUPERSEDE cancels the older one, whose callbacks are then
+            never called
+        @param backend: THREAD runs the task on a thread of the process manager. PROCESS runs it in one of its worker
+            processes, out of reach of the GIL, for cpu bound work. the task and its params must then be picklable,
+            the task defined at module level, and it is called without progress or token, onProgress is never called.
+            cancelling it only discards its result once it has started
+        @param memoKey: when set, the task is memoized under this key. launching it while a task of the same key is
+            active joins that task instead of starting another, every caller's onComplete or onError is called with
+            its outcome. a completed result is kept by the process manager and handed to the next launches of the
+            key without running the task, until it expires or memoPaths change. their onStart, then onProgress with
+            the last progress of the task, then onComplete are called as if it had run
+        @param memoPaths: files or directories the result is computed from, a change notified for one of them or
+            anything inside them drops the memoized result, as does a change of their modification time
+        @param memoResult: when unset, the result is only shared by the launches made while the task is active and
+            is not kept. for results depending on more than the entries of memoPaths, like the size of a tree
         """
         self.__pid: str = pid
         self.__task: Callable[[...], Any] | Callable[[], Any] = task
@@ -33,6 +71,15 @@ class SubProcessItemModel:
         self.__onCompleteParams: Any = onCompleteParams
         self.__onErrorParams: Any = onErrorParams
         self.__name: str = name
+        self.__onProgress: Callable[[...], Any] | None = onProgress
+        self.__progressInterval: float = progressInterval
+        self.__cancellable: bool = cancellable
+        self.__priority: QThread.Priority = priority
+        self.__policy: LaunchPolicy = policy
+        self.__backend: TaskBackend = backend
+        self.__memoKey: Hashable | None = memoKey
+        self.__memoPaths: list[str] = memoPaths or []
+        self.__memoResult: bool = memoResult
 
     def name(self):
         return self.__name
@@ -58,6 +105,36 @@ class SubProcessItemModel:
     def onStart(self):
         return self.__onStart
 
+    def onProgress(self):
+        return self.__onProgress or self.__void
+
+    def reportsProgress(self) -> bool:
+        return self.__onProgress is not None
+
+    def progressInterval(self):
+        return self.__progressInterval
+
+    def cancellable(self) -> bool:
+        return self.__cancellable
+
+    def priority(self) -> QThread.Priority:
+        return self.__priority
+
+    def policy(self) -> LaunchPolicy:
+        return self.__policy
+
+    def backend(self) -> TaskBackend:
+        return self.__backend
+
+    def memoKey(self) -> Hashable | None:
+        return self.__memoKey
+
+    def memoPaths(self) -> list[str]:
+        return self.__memoPaths
+
+    def memoResult(self) -> bool:
+        return self.__memoResult
+
     def startParams(self):
         return self.__onStartParams
 
@@ -0,0 +1,42 @@
+class TaskProgress:
+    def __init__(self, itemsDone: int = 0, bytesDone: int = 0, total: int = None, elapsed: float = 0.0):
+        """
+        how far a task got, as reported from its thread
+        :param itemsDone: items processed so far
+        :param bytesDone: bytes processed so far
+        :param total: items to process, None when unknown
+        :param elapsed: seconds since the task started reporting
+        """
+        self.itemsDone: int = itemsDone
+        self.bytesDone: int = bytesDone
+        self.total: int | None = total
+        self.elapsed: float = elapsed
+
+    def __repr__(self):
+        return f"TaskProgress(items={self.itemsDone}, bytes={self.bytesDone}, total={self.total})"
+
+    def fraction(self) -> float | None:
+        """
+        gets the part of the items processed, between 0 and 1
+        :return: None when the total is unknown
+        """
+        if not self.total:
+            return None
+        return min(1.0, self.itemsDone / self.total)
+
+    def rate(self) -> float:
+        """
+        gets the items processed per second
+        :return:
+        """
+        return self.itemsDone / self.elapsed if self.elapsed > 0 else 0.0
+
+    def eta(self) -> float | None:
+        """
+        estimates the seconds left at the rate so far
+        :return: None when the total is unknown or nothing was processed yet
+        """
+        rate = self.rate()
+        if not self.total or rate <= 0:
+            return None
+        return max(0.0, (self.total - self.itemsDone) / rate)
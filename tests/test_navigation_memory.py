@@ -0,0 +1,71 @@
+"""
+navigates back and forth between two directories and checks that the scene stops growing once warmed up.
+the longer run with the resident memory is benchmarks/navigation_memory.py
+"""
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QObject
+from PySide6.QtWidgets import QApplication
+
+from benchmarks.navigation_memory import makeTree, settle
+from core.structs import LeafBillboardMode, LeafPickMode
+from views.sections.scene import V3DWindow
+
+WARM_UP = 10
+NAVIGATIONS = 40
+
+
+class NavigationMemoryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.large = tempfile.TemporaryDirectory()
+        self.small = tempfile.TemporaryDirectory()
+        makeTree(self.large.name, 60)
+        makeTree(self.small.name, 20)
+
+    def tearDown(self):
+        self.large.cleanup()
+        self.small.cleanup()
+
+    def objectCounts(self, view: V3DWindow, trim: bool = False) -> list[int]:
+        """
+        navigates back and forth, counting the objects under the root entity after every navigation
+        :param view:
+        :param trim: destroys the spare leaves after every navigation instead of keeping them in the pool
+        :return:
+        """
+        counts = []
+        for i in range(WARM_UP + NAVIGATIONS):
+            view.updateScene(self.large.name if i % 2 == 0 else self.small.name)
+            if trim:
+                view.leafPool().trim()
+            settle()
+            counts.append(len(view.rootEntity.findChildren(QObject)))
+        return counts
+
+    def assertPlateaus(self, counts: list[int]):
+        warm = counts[WARM_UP:]
+        # every other navigation shows the same directory, whose count must not move past the warm up
+        self.assertEqual(max(warm[0::2]), warm[0], counts)
+        self.assertEqual(max(warm[1::2]), warm[1], counts)
+
+    def testPooledLeaves(self):
+        self.assertPlateaus(self.objectCounts(V3DWindow()))
+
+    def testDisposedLeaves(self):
+        self.assertPlateaus(self.objectCounts(V3DWindow(), trim=True))
+
+    def testDisposedLeavesOwnComponents(self):
+        view = V3DWindow(billboardMode=LeafBillboardMode.PER_LEAF, pickMode=LeafPickMode.ENTITY)
+        self.assertPlateaus(self.objectCounts(view, trim=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,266 @@
+import numpy as np
+from PySide6.Qt3DCore import Qt3DCore
+from PySide6.Qt3DRender import Qt3DRender
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QPainter, QVector3D
+
+from views.components.entities.instanced_leaves import colorArray
+from views.components.entities.shader_material import BILLBOARD_GLSL, ShaderMaterial
+
+LABEL_VERTEX_SHADER = """#version 150 core
+
+in vec3 labelAnchor;
+in vec2 glyphCorner;
+in vec2 vertexTexCoord;
+in vec3 labelColor;
+
+out vec2 texCoord;
+out vec3 color;
+
+uniform mat4 viewProjectionMatrix;
+uniform vec3 eyePosition;
+uniform float lineHeight;
+""" + BILLBOARD_GLSL + """
+void main()
+{
+    mat3 rotation = billboardRotation(eyePosition);
+    vec3 worldPosition = labelAnchor + rotation * vec3(glyphCorner * lineHeight, 0.0);
+    texCoord = vertexTexCoord;
+    color = labelColor;
+    gl_Position = viewProjectionMatrix * vec4(worldPosition, 1.0);
+}
+"""
+
+LABEL_FRAGMENT_SHADER = """#version 150 core
+
+in vec2 texCoord;
+in vec3 color;
+
+out vec4 fragColor;
+
+uniform sampler2D atlas;
+
+void main()
+{
+    // alpha tested rather than blended, the labels need no sorting against each other
+    if (texture(atlas, texCoord).a < 0.5)
+        discard;
+    fragColor = vec4(color, 1.0);
+}
+"""
+
+# drawn in place of the characters that do not fit in the atlas anymore
+MISSING_GLYPH = "?"
+
+
+class GlyphAtlas(Qt3DRender.QPaintedTextureImage):
+    def __init__(self, font: QFont = None, pixelSize: int = 32, size: int = 1024, parent: Qt3DCore.QNode = None):
+        """
+        texture holding the glyphs drawn by the labels, white on transparent, one fixed size cell per character.
+        characters are added the first time they are asked for, the cells already handed out never move
+        :param font: defaults to the monospace font of the text meshes
+        :param pixelSize: height the glyphs are rasterized at
+        :param size: width and height of the texture, in pixels
+        :param parent:
+        """
+        super().__init__(parent)
+
+        self.__font = QFont('monospace') if font is None else QFont(font)
+        self.__font.setPixelSize(pixelSize)
+        self.__metrics = QFontMetrics(self.__font)
+        self.__size = size
+
+        self.__cellWidth = max(1, self.__metrics.maxWidth())
+        self.__cellHeight = max(1, self.__metrics.height())
+        self.__columns = size // self.__cellWidth
+        self.__capacity = self.__columns * (size // self.__cellHeight)
+
+        # character -> (cell index, advance in line heights)
+        self.__glyphs: dict[str, tuple[int, float]] = {}
+
+        self.setSize(QSize(size, size))
+        self.glyph(MISSING_GLYPH)
+
+    def baseline(self) -> float:
+        """
+        height of the baseline above the bottom of a cell, in line heights
+        :return:
+        """
+        return self.__metrics.descent() / self.__cellHeight
+
+    def glyph(self, char: str) -> tuple[float, float, float, float, float]:
+        """
+        gets the place of a character in the atlas, adding it when needed
+        :param char:
+        :return: the (u0, v0, u1, v1, advance) of the glyph. v0 is the top of the cell, the advance is relative to
+            the line height
+        """
+        glyph = self.__glyphs.get(char)
+        if glyph is None:
+            if len(self.__glyphs) >= self.__capacity:
+                return self.glyph(MISSING_GLYPH)
+            advance = min(self.__metrics.horizontalAdvance(char), self.__cellWidth) / self.__cellHeight
+            glyph = (len(self.__glyphs), advance)
+            self.__glyphs.update({char: glyph})
+            # repainted once by Qt3D, however many characters were added in between
+            self.update()
+
+        cell, advance = glyph
+        x = (cell % self.__columns) * self.__cellWidth
+        y = (cell // self.__columns) * self.__cellHeight
+        width = advance * self.__cellHeight
+        return (x / self.__size, y / self.__size, (x + width) / self.__size, (y + self.__cellHeight) / self.__size,
+                advance)
+
+    def count(self) -> int:
+        return len(self.__glyphs)
+
+    def paint(self, painter: QPainter):
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.fillRect(0, 0, self.__size, self.__size, Qt.GlobalColor.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        painter.setFont(self.__font)
+        painter.setPen(QColor(255, 255, 255))
+
+        ascent = self.__metrics.ascent()
+        for char, (cell, _) in self.__glyphs.items():
+            x = (cell % self.__columns) * self.__cellWidth
+            y = (cell // self.__columns) * self.__cellHeight
+            painter.drawText(x, y + ascent, char)
+
+
+class GlyphLabelLayer:
+    def __init__(self, parentEntity: Qt3DCore.QEntity, lineHeight: float = 0.4, font: QFont = None):
+        """
+        draws the labels of all leaves as camera facing quads textured from a shared glyph atlas, in a single draw
+        call. an alternative to tessellating every label into a QExtrudedTextMesh
+        :param parentEntity:
+        :param lineHeight: height of a line of text in the world
+        :param font:
+        """
+        self.entity = Qt3DCore.QEntity(parentEntity)
+
+        self.atlas = GlyphAtlas(font, parent=self.entity)
+        self.texture = Qt3DRender.QTexture2D(self.entity)
+        self.texture.setFormat(Qt3DRender.QAbstractTexture.TextureFormat.RGBA8_UNorm)
+        self.texture.setMinificationFilter(Qt3DRender.QAbstractTexture.Filter.Linear)
+        self.texture.setMagnificationFilter(Qt3DRender.QAbstractTexture.Filter.Linear)
+        self.texture.addTextureImage(self.atlas)
+
+        self.material = ShaderMaterial(LABEL_VERTEX_SHADER, LABEL_FRAGMENT_SHADER, self.entity)
+        self.material.setParameter("atlas", self.texture)
+        self.material.setParameter("lineHeight", lineHeight)
+        self.__lineHeight = lineHeight
+
+        self.geometry = Qt3DCore.QGeometry(self.entity)
+        self.__anchorAttribute = self.__attribute("labelAnchor", 3)
+        self.__cornerAttribute = self.__attribute("glyphCorner", 2)
+        self.__texCoordAttribute = self.__attribute(Qt3DCore.QAttribute.defaultTextureCoordinateAttributeName(), 2)
+        self.__colorAttribute = self.__attribute("labelColor", 3)
+
+        self.__indexBuffer = Qt3DCore.QBuffer(self.geometry)
+        self.__indexAttribute = Qt3DCore.QAttribute(self.geometry)
+        self.__indexAttribute.setVertexBaseType(Qt3DCore.QAttribute.VertexBaseType.UnsignedInt)
+        self.__indexAttribute.setAttributeType(Qt3DCore.QAttribute.AttributeType.IndexAttribute)
+        self.__indexAttribute.setBuffer(self.__indexBuffer)
+        self.geometry.addAttribute(self.__indexAttribute)
+
+        self.renderer = Qt3DRender.QGeometryRenderer(self.entity)
+        self.renderer.setGeometry(self.geometry)
+        self.renderer.setPrimitiveType(Qt3DRender.QGeometryRenderer.PrimitiveType.Triangles)
+
+        # the geometry has no vertexPosition for Qt3D to compute bounds from
+        self.boundingVolume = Qt3DCore.QBoundingVolume(self.entity)
+
+        self.entity.addComponent(self.renderer)
+        self.entity.addComponent(self.material)
+        self.entity.addComponent(self.boundingVolume)
+
+        self.__colors = np.zeros((0, 3), dtype=np.float32)
+        # pid -> first vertex and number of vertices of its label
+        self.__ranges: dict[str, tuple[int, int]] = {}
+
+        self.setLabels([], QColor(0, 0, 0))
+
+    def setLabels(self, labels: list[tuple[str, str, QVector3D]], color: QColor):
+        """
+        replaces the drawn labels
+        :param labels: the (pid, text, position) of every label, the position is the left end of its baseline
+        :param color: colour of the text
+        :return:
+        """
+        anchors = []
+        corners = []
+        texCoords = []
+        self.__ranges.clear()
+
+        descent = self.atlas.baseline()
+        widest = 0.0
+        for pid, text, pos in labels:
+            first = len(corners)
+            x = 0.0
+            for char in text:
+                u0, v0, u1, v1, advance = self.atlas.glyph(char)
+                corners.extend(((x, -descent), (x + advance, -descent), (x + advance, 1 - descent), (x, 1 - descent)))
+                texCoords.extend(((u0, v1), (u1, v1), (u1, v0), (u0, v0)))
+                x += advance
+            anchors.extend([(pos.x(), pos.y(), pos.z())] * (len(corners) - first))
+            self.__ranges.update({pid: (first, len(corners) - first)})
+            widest = max(widest, x)
+
+        vertices = len(corners)
+        quads = vertices // 4
+        indices = (np.arange(quads, dtype=np.uint32)[:, None] * 4 + np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32))
+
+        anchors = np.array(anchors, dtype=np.float32).reshape(-1, 3)
+        self.__colors = np.tile(colorArray(color), (vertices, 1)).astype(np.float32)
+
+        self.__setData(self.__anchorAttribute, anchors)
+        self.__setData(self.__cornerAttribute, np.array(corners, dtype=np.float32).reshape(-1, 2))
+        self.__setData(self.__texCoordAttribute, np.array(texCoords, dtype=np.float32).reshape(-1, 2))
+        self.__setData(self.__colorAttribute, self.__colors)
+        self.__indexBuffer.setData(indices.reshape(-1).tobytes())
+        self.__indexAttribute.setCount(quads * 6)
+        self.renderer.setVertexCount(quads * 6)
+
+        if vertices > 0:
+            reach = (widest + 1) * self.__lineHeight
+            self.boundingVolume.setMinPoint(QVector3D(*(anchors.min(axis=0) - reach)))
+            self.boundingVolume.setMaxPoint(QVector3D(*(anchors.max(axis=0) + reach)))
+        self.entity.setEnabled(vertices > 0)
+
+    def setColor(self, pid: str, color: QColor):
+        """
+        changes the colour of one label, uploading only its vertices
+        :param pid:
+        :param color:
+        :return:
+        """
+        span = self.__ranges.get(pid)
+        if span is None or span[1] == 0:
+            return
+        first, count = span
+        self.__colors[first:first + count] = colorArray(color)
+        self.__colorAttribute.buffer().updateData(first * 3 * 4, self.__colors[first:first + count].tobytes())
+
+    def count(self) -> int:
+        return len(self.__ranges)
+
+    def clear(self):
+        self.setLabels([], QColor(0, 0, 0))
+
+    def __attribute(self, name: str, size: int) -> Qt3DCore.QAttribute:
+        attribute = Qt3DCore.QAttribute(self.geometry)
+        attribute.setName(name)
+        attribute.setVertexBaseType(Qt3DCore.QAttribute.VertexBaseType.Float)
+        attribute.setVertexSize(size)
+        attribute.setAttributeType(Qt3DCore.QAttribute.AttributeType.VertexAttribute)
+        attribute.setBuffer(Qt3DCore.QBuffer(self.geometry))
+        attribute.setByteStride(size * 4)
+        self.geometry.addAttribute(attribute)
+        return attribute
+
+    @staticmethod
+    def __setData(attribute: Qt3DCore.QAttribute, data: np.ndarray):
+        attribute.buffer().setData(np.ascontiguousarray(data, dtype=np.float32).tobytes())
+        attribute.setCount(len(data))
@@ -0,0 +1,231 @@
+import numpy as np
+from PySide6.Qt3DCore import Qt3DCore
+from PySide6.Qt3DRender import Qt3DRender
+from PySide6.QtGui import QColor, QVector3D
+
+from core.structs import LeafType
+from core.utils.mesh_loader import cuboidArrays, readObj
+from views.components.entities.shader_material import BILLBOARD_GLSL, ShaderMaterial
+
+INSTANCED_VERTEX_SHADER = """#version 150 core
+
+in vec3 vertexPosition;
+in vec3 vertexNormal;
+in vec3 instanceOffset;
+in vec3 instanceColor;
+
+out vec3 worldPosition;
+out vec3 worldNormal;
+out vec3 color;
+
+uniform mat4 viewProjectionMatrix;
+uniform vec3 eyePosition;
+uniform float iconScale;
+""" + BILLBOARD_GLSL + """
+void main()
+{
+    mat3 rotation = billboardRotation(eyePosition);
+    worldNormal = rotation * vertexNormal;
+    worldPosition = instanceOffset + rotation * (vertexPosition * iconScale);
+    color = instanceColor;
+    gl_Position = viewProjectionMatrix * vec4(worldPosition, 1.0);
+}
+"""
+
+INSTANCED_FRAGMENT_SHADER = """#version 150 core
+
+in vec3 worldPosition;
+in vec3 worldNormal;
+in vec3 color;
+
+out vec4 fragColor;
+
+uniform vec3 eyePosition;
+
+void main()
+{
+    // head light, close to a phong material whose ambient and diffuse share the base colour
+    vec3 toEye = normalize(eyePosition - worldPosition);
+    float diffuse = abs(dot(normalize(worldNormal), toEye));
+    fragColor = vec4(color * (0.4 + 0.6 * diffuse), 1.0);
+}
+"""
+
+LEAF_MESH_SOURCES = {
+    LeafType.FILE: ":/meshes/file_light.obj",
+    LeafType.FOLDER: ":/meshes/folder_light.obj",
+}
+
+
+def colorArray(color: QColor) -> np.ndarray:
+    return np.array([color.redF(), color.greenF(), color.blueF()], dtype=np.float32)
+
+
+class InstancedLeafBatch:
+    def __init__(self, parentEntity: Qt3DCore.QEntity, arrays: tuple[np.ndarray, np.ndarray, np.ndarray],
+                 material: ShaderMaterial):
+        """
+        all the icons of one LeafType, drawn from a single geometry in one instanced draw call.
+        every instance has its own position and colour, read from per instance buffers
+        :param parentEntity:
+        :param arrays: the (positions, normals, indices) of the icon mesh
+        :param material:
+        """
+        positions, normals, indices = arrays
+
+        self.entity = Qt3DCore.QEntity(parentEntity)
+        self.geometry = Qt3DCore.QGeometry(self.entity)
+
+        self.geometry.addAttribute(self.__vertexAttribute(Qt3DCore.QAttribute.defaultPositionAttributeName(),
+                                                          positions))
+        self.geometry.addAttribute(self.__vertexAttribute(Qt3DCore.QAttribute.defaultNormalAttributeName(),
+                                                          normals))
+
+        indexBuffer = Qt3DCore.QBuffer(self.geometry)
+        indexBuffer.setData(indices.tobytes())
+        indexAttribute = Qt3DCore.QAttribute(self.geometry)
+        indexAttribute.setVertexBaseType(Qt3DCore.QAttribute.VertexBaseType.UnsignedInt)
+        indexAttribute.setAttributeType(Qt3DCore.QAttribute.AttributeType.IndexAttribute)
+        indexAttribute.setBuffer(indexBuffer)
+        indexAttribute.setCount(len(indices))
+        self.geometry.addAttribute(indexAttribute)
+
+        # per instance data, advanced once per icon instead of once per vertex
+        self.__offsets = np.zeros((0, 3), dtype=np.float32)
+        self.__colors = np.zeros((0, 3), dtype=np.float32)
+        self.offsetAttribute = self.__vertexAttribute("instanceOffset", self.__offsets, divisor=1)
+        self.colorAttribute = self.__vertexAttribute("instanceColor", self.__colors, divisor=1)
+        self.geometry.addAttribute(self.offsetAttribute)
+        self.geometry.addAttribute(self.colorAttribute)
+
+        self.renderer = Qt3DRender.QGeometryRenderer(self.entity)
+        self.renderer.setGeometry(self.geometry)
+        self.renderer.setPrimitiveType(Qt3DRender.QGeometryRenderer.PrimitiveType.Triangles)
+        self.renderer.setInstanceCount(0)
+
+        # the bounds computed from the mesh alone would get the whole batch culled, they must cover every instance
+        self.boundingVolume = Qt3DCore.QBoundingVolume(self.entity)
+
+        self.entity.addComponent(self.renderer)
+        self.entity.addComponent(material)
+        self.entity.addComponent(self.boundingVolume)
+        self.entity.setEnabled(False)
+
+    def setInstances(self, offsets: np.ndarray, colors: np.ndarray):
+        """
+        replaces all the instances of the batch
+        :param offsets: (N,3) positions of the icons
+        :param colors: (N,3) rgb colours of the icons, in [0, 1]
+        :return:
+        """
+        self.__offsets = np.ascontiguousarray(offsets, dtype=np.float32).reshape(-1, 3)
+        self.__colors = np.ascontiguousarray(colors, dtype=np.float32).reshape(-1, 3)
+        n = len(self.__offsets)
+
+        self.offsetAttribute.buffer().setData(self.__offsets.tobytes())
+        self.offsetAttribute.setCount(n)
+        self.colorAttribute.buffer().setData(self.__colors.tobytes())
+        self.colorAttribute.setCount(n)
+        self.renderer.setInstanceCount(n)
+
+        if n > 0:
+            self.boundingVolume.setMinPoint(QVector3D(*(self.__offsets.min(axis=0) - 2)))
+            self.boundingVolume.setMaxPoint(QVector3D(*(self.__offsets.max(axis=0) + 2)))
+        self.entity.setEnabled(n > 0)
+
+    def setColor(self, index: int, color: np.ndarray):
+        """
+        changes the colour of a single instance, uploading only its three floats
+        :param index:
+        :param color:
+        :return:
+        """
+        self.__colors[index] = color
+        self.colorAttribute.buffer().updateData(index * self.__colors.itemsize * 3, self.__colors[index].tobytes())
+
+    def count(self) -> int:
+        return len(self.__offsets)
+
+    def __vertexAttribute(self, name: str, data: np.ndarray, divisor: int = 0) -> Qt3DCore.QAttribute:
+        buffer = Qt3DCore.QBuffer(self.geometry)
+        buffer.setData(np.ascontiguousarray(data, dtype=np.float32).tobytes())
+
+        attribute = Qt3DCore.QAttribute(self.geometry)
+        attribute.setName(name)
+        attribute.setVertexBaseType(Qt3DCore.QAttribute.VertexBaseType.Float)
+        attribute.setVertexSize(3)
+        attribute.setAttributeType(Qt3DCore.QAttribute.AttributeType.VertexAttribute)
+        attribute.setBuffer(buffer)
+        attribute.setByteStride(3 * 4)
+        attribute.setCount(len(data))
+        attribute.setDivisor(divisor)
+        return attribute
+
+
+class InstancedLeafLayer:
+    def __init__(self, parentEntity: Qt3DCore.QEntity, iconScale: float = 1.0):
+        """
+        draws the icons of all leaves with one instanced batch per LeafType, so the cost of the scene follows the
+        number of types rather than the number of files.
+        the leaves themselves have no entity, they are picked by casting the mouse ray against their positions
+        :param parentEntity:
+        :param iconScale:
+        """
+        self.__parentEntity = parentEntity
+        self.__material = ShaderMaterial(INSTANCED_VERTEX_SHADER, INSTANCED_FRAGMENT_SHADER, parentEntity)
+        self.__material.setParameter("iconScale", iconScale)
+
+        self.__batches: dict[LeafType, InstancedLeafBatch] = {}
+        self.__slots: dict[str, tuple[LeafType, int]] = {}
+
+    def setLeaves(self, leaves: list[tuple[str, LeafType, QVector3D]], colors: dict[LeafType, QColor]):
+        """
+        replaces the drawn icons
+        :param leaves: the (pid, type, position) of every leaf
+        :param colors: base colour of every type
+        :return:
+        """
+        grouped: dict[LeafType, list[tuple[str, QVector3D]]] = {}
+        for pid, leafType, pos in leaves:
+            grouped.setdefault(leafType, []).append((pid, pos))
+
+        self.__slots.clear()
+        for leafType in set(grouped).union(self.__batches):
+            items = grouped.get(leafType, [])
+            batch = self.__batch(leafType)
+            offsets = np.array([[p.x(), p.y(), p.z()] for _, p in items], dtype=np.float32).reshape(-1, 3)
+            color = colorArray(colors.get(leafType, QColor(0, 0, 0)))
+            batch.setInstances(offsets, np.tile(color, (len(items), 1)))
+            for i, (pid, _) in enumerate(items):
+                self.__slots.update({pid: (leafType, i)})
+
+    def setColor(self, pid: str, color: QColor):
+        """
+        changes the colour of the icon of one leaf
+        :param pid:
+        :param color:
+        :return:
+        """
+        slot = self.__slots.get(pid)
+        if slot is None:
+            return
+        self.__batches[slot[0]].setColor(slot[1], colorArray(color))
+
+    def clear(self):
+        self.setLeaves([], {})
+
+    def batchCount(self) -> int:
+        """
+        counts the batches drawing at least one leaf, empty batches are disabled
+        :return:
+        """
+        return sum(1 for batch in self.__batches.values() if batch.entity.isEnabled())
+
+    def __batch(self, leafType: LeafType) -> InstancedLeafBatch:
+        batch = self.__batches.get(leafType)
+        if batch is None:
+            source = LEAF_MESH_SOURCES.get(leafType)
+            arrays = readObj(source) if source is not None else cuboidArrays()
+            batch = InstancedLeafBatch(self.__parentEntity, arrays, self.__material)
+            self.__batches.update({leafType: batch})
+        return batch
@@ -0,0 +1,108 @@
+import numpy as np
+from PySide6.Qt3DRender import Qt3DRender
+from PySide6.QtCore import QObject, Signal, QPointF, QSize, Qt
+from PySide6.QtGui import QVector3D
+
+from core.utils.spatial_index import SpatialGrid
+from models.leaf_click_options import LeafClickOptions
+from views.components.entities.tree_leaf import TreeLeaf
+
+# radius of the sphere a leaf is picked with, about the size of the icon meshes
+PICK_RADIUS = 1.2
+
+PICK_BUTTONS = {
+    Qt.MouseButton.LeftButton: Qt3DRender.QPickEvent.Buttons.LeftButton,
+    Qt.MouseButton.RightButton: Qt3DRender.QPickEvent.Buttons.RightButton,
+    Qt.MouseButton.MiddleButton: Qt3DRender.QPickEvent.Buttons.MiddleButton,
+    Qt.MouseButton.BackButton: Qt3DRender.QPickEvent.Buttons.BackButton,
+}
+
+
+class LeafRayPicker(QObject):
+    clicked = Signal(LeafClickOptions)
+
+    def __init__(self, camera: Qt3DRender.QCamera, radius: float = PICK_RADIUS, parent: QObject = None):
+        """
+        picks the leaves of a scene by casting the mouse ray against a bounding sphere around each of them, in
+        place of an object picker per leaf. the spheres are indexed by a grid, a click costs about the same whatever
+        the number of leaves
+        :param camera: the camera of the scene
+        :param radius: radius of the spheres
+        :param parent:
+        """
+        super().__init__(parent)
+
+        self.__camera = camera
+        self.__radius = radius
+        self.__leaves: list[TreeLeaf] = []
+        self.__index: SpatialGrid | None = None
+
+    def setLeaves(self, leaves: list[TreeLeaf]):
+        """
+        replaces the leaves that can be picked, at their current position
+        :param leaves:
+        :return:
+        """
+        self.__leaves = list(leaves)
+        positions = np.array([[p.x(), p.y(), p.z()] for p in (leaf.position() for leaf in self.__leaves)],
+                             dtype=np.float64).reshape(-1, 3)
+        self.__index = SpatialGrid(positions)
+
+    def ray(self, position: QPointF, size: QSize) -> tuple[np.ndarray, np.ndarray]:
+        """
+        the ray going from the camera through a point of the window
+        :param position: the point, in window coordinates
+        :param size: size of the window
+        :return: the (origin, direction) of the ray, in world coordinates
+        """
+        x = 2 * position.x() / max(size.width(), 1) - 1
+        y = 1 - 2 * position.y() / max(size.height(), 1)
+
+        viewProjection = self.__camera.projectionMatrix() * self.__camera.viewMatrix()
+        inverse = np.linalg.inv(np.array(viewProjection.copyDataTo()).reshape(4, 4))
+        near = inverse @ np.array([x, y, -1.0, 1.0])
+        far = inverse @ np.array([x, y, 1.0, 1.0])
+        near = near[:3] / near[3]
+        far = far[:3] / far[3]
+        return near, far - near
+
+    def pick(self, position: QPointF, size: QSize) -> tuple[TreeLeaf, float, QVector3D] | None:
+        """
+        finds the leaf under a point of the window
+        :param position: the point, in window coordinates
+        :param size: size of the window
+        :return: the leaf, the distance to it and the point hit, None when there is no leaf under the point
+        """
+        if self.__index is None:
+            return None
+
+        origin, direction = self.ray(position, size)
+        hit = self.__index.raycast(origin, direction, self.__radius)
+        if hit is None:
+            return None
+
+        index, distance = hit
+        point = origin + direction / np.linalg.norm(direction) * distance
+        return self.__leaves[index], distance, QVector3D(*point.tolist())
+
+    def click(self, position: QPointF, size: QSize, button: Qt.MouseButton, buttons: Qt.MouseButton,
+              modifiers: Qt.KeyboardModifier) -> bool:
+        """
+        emits clicked for the leaf under a point of the window, with a pick event like the one of an object picker
+        :param position: the point, in window coordinates
+        :param size: size of the window
+        :param button: the button clicked
+        :param buttons: the buttons held
+        :param modifiers: the keyboard modifiers held
+        :return: whether a leaf was clicked
+        """
+        hit = self.pick(position, size)
+        if hit is None:
+            return False
+
+        leaf, distance, point = hit
+        event = Qt3DRender.QPickEvent(position, point, point - leaf.position(), distance,
+                                      PICK_BUTTONS.get(button, Qt3DRender.QPickEvent.Buttons.NoButton),
+                                      int(buttons.value), int(modifiers.value))
+        self.clicked.emit(LeafClickOptions(leaf.model, event))
+        return True
@@ -0,0 +1,163 @@
+from PySide6.Qt3DCore import (Qt3DCore)
+from PySide6.Qt3DExtras import (Qt3DExtras)
+from PySide6.Qt3DRender import (Qt3DRender)
+from PySide6.QtCore import QUrl
+from PySide6.QtGui import QColor
+
+from core.structs import LeafType
+from views.components.entities.look_at_transform import LookAtTransform
+
+# full resolution mesh first, then the pre-decimated levels of detail built by core/utils/mesh_lod.py
+LEAF_MESH_URLS = {
+    LeafType.FILE: ("qrc:/meshes/file_light.obj", "qrc:/meshes/file_light_lod1.obj",
+                    "qrc:/meshes/file_light_lod2.obj"),
+    LeafType.FOLDER: ("qrc:/meshes/folder_light.obj", "qrc:/meshes/folder_light_lod1.obj",
+                      "qrc:/meshes/folder_light_lod2.obj"),
+}
+
+# distance to the camera beyond which an icon switches to the next level of detail
+LOD_DISTANCES = (35.0, 55.0)
+
+HIGHLIGHT_COLOR = "#2dbd3e"  # neon green
+BASE_TEXT_COLOR = QColor(255, 0, 0)  # red
+BASE_SHINE = 5
+HIGHLIGHT_SHINE = 10
+
+
+def leafIconColor(leafType: LeafType) -> QColor:
+    """
+    base colour of the icon of a leaf type
+    :param leafType:
+    :return:
+    """
+    if leafType == LeafType.FILE:
+        return QColor(50, 130, 246)  # blue
+    if leafType == LeafType.DRIVE:
+        return QColor(128, 128, 128)  # grey
+    if leafType == LeafType.FOLDER:
+        return QColor(255, 201, 14)  # yellow
+    return QColor(0, 0, 0)  # default black
+
+
+class LeafResourcePool:
+    def __init__(self, parentEntity: Qt3DCore.QEntity, camera: Qt3DRender.QCamera = None):
+        """
+        the meshes, materials and billboard transforms shared by all the leaves of a scene. every mesh is loaded once
+        per LeafType and every leaf of a type points at the same base and highlight materials, highlighting a leaf
+        only swaps the material component of its entities.
+        the resources are owned by parentEntity and must outlive the leaves using them
+        :param parentEntity:
+        :param camera: the camera the billboards face
+        """
+        self.__parentEntity = parentEntity
+        self.__camera = camera
+
+        self.__billboards: dict[float, LookAtTransform] = {}
+
+        self.__meshes: dict[tuple[LeafType, int], Qt3DRender.QGeometryRenderer] = {}
+        self.__iconMaterials: dict[LeafType, Qt3DExtras.QPhongMaterial] = {}
+        self.__iconHighlightMaterial: Qt3DExtras.QPhongMaterial | None = None
+        self.__textMaterial: Qt3DExtras.QPhongMaterial | None = None
+        self.__textHighlightMaterial: Qt3DExtras.QPhongMaterial | None = None
+
+    def iconMesh(self, leafType: LeafType, level: int = 0) -> Qt3DRender.QGeometryRenderer:
+        """
+        gets the icon mesh of a leaf type, loading it on first use.
+        types without an obj mesh are drawn as a cube
+        :param leafType:
+        :param level: level of detail, 0 is the full resolution mesh. clamped to the levels the type has
+        :return:
+        """
+        urls = LEAF_MESH_URLS.get(leafType)
+        if urls is None:
+            # all the types without a mesh share a single cube
+            mesh = self.__meshes.get((LeafType.UNSET, 0))
+            if mesh is None:
+                mesh = Qt3DExtras.QCuboidMesh(self.__parentEntity)
+                self.__meshes.update({(LeafType.UNSET, 0): mesh})
+            return mesh
+
+        level = min(max(level, 0), len(urls) - 1)
+        mesh = self.__meshes.get((leafType, level))
+        if mesh is None:
+            mesh = Qt3DRender.QMesh(self.__parentEntity)
+            mesh.setSource(QUrl(urls[level]))
+            self.__meshes.update({(leafType, level): mesh})
+        return mesh
+
+    @staticmethod
+    def lodLevels(leafType: LeafType) -> int:
+        """
+        number of levels of detail of the icon mesh of a leaf type
+        :param leafType:
+        :return:
+        """
+        return len(LEAF_MESH_URLS.get(leafType, (None,)))
+
+    def billboard(self, scale: float) -> LookAtTransform:
+        """
+        gets the transform turning the entities of every leaf towards the camera, one per scale.
+        it only holds a rotation and a scale, the leaves translate it through a parent entity. whatever the number of
+        leaves, a camera move updates one transform per scale
+        :param scale:
+        :return:
+        """
+        billboard = self.__billboards.get(scale)
+        if billboard is None:
+            billboard = LookAtTransform(self.__camera, scale=scale, parent=self.__parentEntity)
+            self.__billboards.update({scale: billboard})
+        return billboard
+
+    def iconMaterial(self, leafType: LeafType) -> Qt3DExtras.QPhongMaterial:
+        """
+        gets the material of the icons of a leaf type when they are not highlighted
+        :param leafType:
+        :return:
+        """
+        material = self.__iconMaterials.get(leafType)
+        if material is None:
+            color = leafIconColor(leafType)
+            material = self.__phongMaterial(color, color, BASE_SHINE)
+            self.__iconMaterials.update({leafType: material})
+        return material
+
+    def iconHighlightMaterial(self) -> Qt3DExtras.QPhongMaterial:
+        """
+        gets the material of a highlighted icon, the same for all leaf types
+        :return:
+        """
+        if self.__iconHighlightMaterial is None:
+            color = QColor(HIGHLIGHT_COLOR)
+            self.__iconHighlightMaterial = self.__phongMaterial(color, color, HIGHLIGHT_SHINE, color)
+        return self.__iconHighlightMaterial
+
+    def textMaterial(self) -> Qt3DExtras.QPhongMaterial:
+        """
+        gets the material of the labels when they are not highlighted
+        :return:
+        """
+        if self.__textMaterial is None:
+            # only the diffuse colour of the labels was ever set, the ambient keeps the phong default
+            self.__textMaterial = self.__phongMaterial(BASE_TEXT_COLOR, None, BASE_SHINE)
+        return self.__textMaterial
+
+    def textHighlightMaterial(self) -> Qt3DExtras.QPhongMaterial:
+        """
+        gets the material of a highlighted label
+        :return:
+        """
+        if self.__textHighlightMaterial is None:
+            color = QColor(HIGHLIGHT_COLOR)
+            self.__textHighlightMaterial = self.__phongMaterial(color, color, HIGHLIGHT_SHINE, color)
+        return self.__textHighlightMaterial
+
+    def __phongMaterial(self, diffuse: QColor, ambient: QColor | None, shininess: float,
+                        specular: QColor = None) -> Qt3DExtras.QPhongMaterial:
+        material = Qt3DExtras.QPhongMaterial(self.__parentEntity)
+        material.setDiffuse(diffuse)
+        if ambient is not None:
+            material.setAmbient(ambient)
+        if specular is not None:
+            material.setSpecular(specular)
+        material.setShininess(shininess)
+        return material
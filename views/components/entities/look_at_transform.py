@@ -0,0 +1,49 @@
+from PySide6.Qt3DCore import (Qt3DCore)
+from PySide6.Qt3DRender import (Qt3DRender)
+from PySide6.QtCore import QObject, Slot
+from PySide6.QtGui import (QMatrix4x4, QVector3D)
+
+
+class LookAtTransform(Qt3DCore.QTransform):
+    def __init__(self, camera: Qt3DRender.QCamera, scale: float = 1.0,
+                 pos: QVector3D = QVector3D(0, 0, 0), parent: QObject = None):
+        super().__init__(parent)
+        self.camera = camera
+        self.target = QVector3D(0, 0, 0)
+        self.__pos = pos
+        self.__scale = scale
+        self.update_rotation()
+
+        self.camera.positionChanged.connect(self.update_rotation)
+        self.camera.viewCenterChanged.connect(self.update_rotation)
+
+    def setCameraTransformTarget(self, target: QVector3D):
+        self.target = target
+        self.update_rotation()
+
+    @Slot()
+    def update_rotation(self):
+        forward = (self.camera.position() - self.target).normalized()
+        up = QVector3D(0.0, 1.0, 0.0)  # Assuming Y-up coordinate system
+        right = QVector3D.crossProduct(up, forward).normalized()
+        up = QVector3D.crossProduct(forward, right).normalized()
+
+        rotation_matrix = QMatrix4x4(
+            right.x(), up.x(), forward.x(), 0.0,
+            right.y(), up.y(), forward.y(), 0.0,
+            right.z(), up.z(), forward.z(), 0.0,
+            0.0, 0.0, 0.0, 1.0
+        )
+        self.setMatrix(rotation_matrix)
+        self.setScale(self.__scale)
+        self.setTranslation(self.__pos)
+
+    def setPosition(self, pos: QVector3D):
+        self.__pos = pos
+
+    def pos(self):
+        return self.__pos
+
+    def setScale(self, scale: float) -> None:
+        self.__scale = scale
+        super().setScale(scale)
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from core.utils.spatial_index import SpatialGrid
+from models.directory_snapshot import DirectorySnapshot
+from models.tree_leaf_model import TreeLeafModel
+from views.components.entities.tree_leaf import TreeLeaf
+
+
+class CachedScene:
+    def __init__(self, snapshot: DirectorySnapshot, models: list[TreeLeafModel], leaves: dict[str, TreeLeaf],
+                 layout: np.ndarray = None, index: SpatialGrid = None):
+        """
+        a scene taken out of the window with its leaves, disabled, so that going back to its directory only has to
+        enable them again
+        :param snapshot: the listing the scene was built from
+        :param models: the leaf model of every entry, in the order of the snapshot
+        :param leaves: the leaves of the scene by pid
+        :param layout: positions of all the entries of a virtualized scene
+        :param index: spatial index over layout, for virtualized scenes
+        """
+        self.snapshot: DirectorySnapshot = snapshot
+        self.models: list[TreeLeafModel] = models
+        self.leaves: dict[str, TreeLeaf] = leaves
+        self.layout: np.ndarray | None = layout
+        self.index: SpatialGrid | None = index
+
+    def path(self) -> str:
+        return self.snapshot.path
+
+    def leafCount(self) -> int:
+        return len(self.leaves)
+
+
+class SceneCache:
+    def __init__(self, onEvict: Callable[[CachedScene], None], capacity: int = 4, maxLeaves: int = 4000):
+        """
+        least recently used cache of the scenes left by navigations.
+        the entities are what a scene weighs, so memory is capped through the number of leaves kept across all
+        the scenes
+        :param onEvict: called with every scene dropped from the cache, which has to take care of its leaves
+        :param capacity: most scenes kept
+        :param maxLeaves: most leaves kept across all the scenes, larger scenes are never kept
+        """
+        self.__onEvict = onEvict
+        self.__capacity: int = capacity
+        self.__maxLeaves: int = maxLeaves
+        self.__scenes: OrderedDict[str, CachedScene] = OrderedDict()
+        self.__leafCount: int = 0
+
+    def __len__(self):
+        return len(self.__scenes)
+
+    def __contains__(self, path: str):
+        return path in self.__scenes
+
+    def leafCount(self) -> int:
+        return self.__leafCount
+
+    def put(self, scene: CachedScene):
+        """
+        stores a scene, evicting the least recently stored ones past the limits
+        :param scene:
+        :return:
+        """
+        self.__evict(self.__scenes.pop(scene.path(), None))
+        self.__scenes.update({scene.path(): scene})
+        self.__leafCount += scene.leafCount()
+        while len(self.__scenes) > self.__capacity or self.__leafCount > self.__maxLeaves:
+            self.__evict(self.__scenes.pop(next(iter(self.__scenes))))
+
+    def take(self, path: str) -> CachedScene | None:
+        """
+        removes the scene of a directory from the cache and returns it
+        :param path:
+        :return:
+        """
+        scene = self.__scenes.pop(path, None)
+        if scene is not None:
+            self.__leafCount -= scene.leafCount()
+        return scene
+
+    def clear(self):
+        while self.__scenes:
+            self.__evict(self.__scenes.popitem(last=False)[1])
+
+    def __evict(self, scene: CachedScene | None):
+        if scene is None:
+            return
+        self.__leafCount -= scene.leafCount()
+        self.__onEvict(scene)
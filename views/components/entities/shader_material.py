@@ -0,0 +1,84 @@
+from typing import Any
+
+from PySide6.Qt3DCore import Qt3DCore
+from PySide6.Qt3DRender import Qt3DRender
+from PySide6.QtCore import QByteArray
+
+# billboard orientation shared by the shaders, the same basis LookAtTransform builds on the cpu:
+# facing the camera from the origin with y up
+BILLBOARD_GLSL = """
+mat3 billboardRotation(vec3 eye)
+{
+    vec3 forward = normalize(eye);
+    vec3 right = normalize(cross(vec3(0.0, 1.0, 0.0), forward));
+    vec3 up = cross(forward, right);
+    return mat3(right, up, forward);
+}
+"""
+
+
+class ShaderMaterial(Qt3DRender.QMaterial):
+    def __init__(self, vertexShader: str, fragmentShader: str, parent: Qt3DCore.QNode = None,
+                 transparent: bool = False):
+        """
+        material running custom glsl 150 shaders in the forward renderer of Qt3DWindow.
+        the standard Qt3D uniforms (viewProjectionMatrix, modelMatrix, eyePosition, ...) and attributes
+        (vertexPosition, vertexNormal, vertexTexCoord) are available to the shaders
+        :param vertexShader: glsl source of the vertex stage
+        :param fragmentShader: glsl source of the fragment stage
+        :param parent:
+        :param transparent: enables alpha blending
+        """
+        super().__init__(parent)
+
+        self.__parameters: dict[str, Qt3DRender.QParameter] = {}
+
+        self.program = Qt3DRender.QShaderProgram(self)
+        self.program.setVertexShaderCode(QByteArray(vertexShader.encode("utf-8")))
+        self.program.setFragmentShaderCode(QByteArray(fragmentShader.encode("utf-8")))
+
+        renderPass = Qt3DRender.QRenderPass(self)
+        renderPass.setShaderProgram(self.program)
+        if transparent:
+            blendState = Qt3DRender.QBlendEquationArguments(renderPass)
+            blendState.setSourceRgb(Qt3DRender.QBlendEquationArguments.Blending.SourceAlpha)
+            blendState.setDestinationRgb(Qt3DRender.QBlendEquationArguments.Blending.OneMinusSourceAlpha)
+            blendEquation = Qt3DRender.QBlendEquation(renderPass)
+            blendEquation.setBlendFunction(Qt3DRender.QBlendEquation.BlendFunction.Add)
+            renderPass.addRenderState(blendState)
+            renderPass.addRenderState(blendEquation)
+
+        filterKey = Qt3DRender.QFilterKey(self)
+        filterKey.setName("renderingStyle")
+        filterKey.setValue("forward")
+
+        technique = Qt3DRender.QTechnique(self)
+        technique.graphicsApiFilter().setApi(Qt3DRender.QGraphicsApiFilter.Api.OpenGL)
+        technique.graphicsApiFilter().setProfile(Qt3DRender.QGraphicsApiFilter.OpenGLProfile.CoreProfile)
+        technique.graphicsApiFilter().setMajorVersion(3)
+        technique.graphicsApiFilter().setMinorVersion(2)
+        technique.addFilterKey(filterKey)
+        technique.addRenderPass(renderPass)
+
+        effect = Qt3DRender.QEffect(self)
+        effect.addTechnique(technique)
+        self.setEffect(effect)
+
+    def setParameter(self, name: str, value: Any):
+        """
+        sets the value of a uniform, creating its parameter on first use
+        :param name:
+        :param value:
+        :return:
+        """
+        parameter = self.__parameters.get(name)
+        if parameter is None:
+            parameter = Qt3DRender.QParameter(name, value, self)
+            self.__parameters.update({name: parameter})
+            self.addParameter(parameter)
+            return
+        parameter.setValue(value)
+
+    def parameter(self, name: str) -> Any:
+        parameter = self.__parameters.get(name)
+        return None if parameter is None else parameter.value()
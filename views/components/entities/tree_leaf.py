@@ -1,133 +1,149 @@
 from PySide6.Qt3DCore import (Qt3DCore)
 from PySide6.Qt3DExtras import (Qt3DExtras)
 from PySide6.Qt3DRender import (Qt3DRender)
-from PySide6.QtCore import QObject, Signal, Slot, QUrl
-from PySide6.QtGui import (QMatrix4x4, QQuaternion, QVector3D, QFont, QColor)
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import (QQuaternion, QVector3D, QFont)
 
+from core.structs import LeafBillboardMode
 from models.leaf_click_options import LeafClickOptions
 from models.tree_leaf_model import TreeLeafModel
-
-
-class LookAtTransform(Qt3DCore.QTransform):
-    def __init__(self, camera: Qt3DRender.QCamera, scale: float = 1.0,
-                 pos: QVector3D = QVector3D(0, 0, 0), parent: QObject = None):
-        super().__init__(parent)
-        self.camera = camera
-        self.target = QVector3D(0, 0, 0)
-        self.__pos = pos
-        self.__scale = scale
-        self.update_rotation()
-
-        self.camera.positionChanged.connect(self.update_rotation)
-        self.camera.viewCenterChanged.connect(self.update_rotation)
-
-    def setCameraTransformTarget(self, target: QVector3D):
-        self.target = target
-        self.update_rotation()
-
-    @Slot()
-    def update_rotation(self):
-        forward = (self.camera.position() - self.target).normalized()
-        up = QVector3D(0.0, 1.0, 0.0)  # Assuming Y-up coordinate system
-        right = QVector3D.crossProduct(up, forward).normalized()
-        up = QVector3D.crossProduct(forward, right).normalized()
-
-        rotation_matrix = QMatrix4x4(
-            right.x(), up.x(), forward.x(), 0.0,
-            right.y(), up.y(), forward.y(), 0.0,
-            right.z(), up.z(), forward.z(), 0.0,
-            0.0, 0.0, 0.0, 1.0
-        )
-        self.setMatrix(rotation_matrix)
-        self.setScale(self.__scale)
-        self.setTranslation(self.__pos)
-
-    def setPosition(self, pos: QVector3D):
-        self.__pos = pos
-
-    def pos(self):
-        return self.__pos
-
-    def setScale(self, scale: float) -> None:
-        self.__scale = scale
-        super().setScale(scale)
+from views.components.entities.leaf_resources import LeafResourcePool, leafIconColor, HIGHLIGHT_COLOR, \
+    BASE_TEXT_COLOR, BASE_SHINE, LOD_DISTANCES
+from views.components.entities.look_at_transform import LookAtTransform
 
 
 class TreeLeaf(QObject):
     clicked = Signal(LeafClickOptions)
 
-    def __init__(self, parentEntity, camera: Qt3DRender.QCamera, model: TreeLeafModel = None):
+    def __init__(self, parentEntity, camera: Qt3DRender.QCamera, model: TreeLeafModel = None,
+                 drawsIcon: bool = True, resources: LeafResourcePool = None,
+                 drawsLabel: bool = True, billboardMode: LeafBillboardMode = LeafBillboardMode.PER_LEAF,
+                 pickable: bool = True):
+        """
+        an item of the scene, its icon and its label
+        :param parentEntity:
+        :param camera:
+        :param model:
+        :param drawsIcon: when False, the icon is drawn elsewhere (instanced) and the leaf has no icon entity. it only
+            keeps its position, for the scene to pick it (ray picking)
+        :param resources: the meshes and materials shared with the other leaves of the scene. a pool of its own is
+            created when omitted
+        :param drawsLabel: when False, the label is drawn elsewhere (glyph atlas) and the leaf has no text entity
+        :param billboardMode: PER_LEAF gives the icon and the label their own LookAtTransform, following the camera.
+            SHARED only gives them a fixed translation, the rotation towards the camera comes from the transforms of
+            resources, shared by every leaf
+        :param pickable: when False, the leaf has no object picker and clicks are found by the scene (ray picking).
+            clicked is then never emitted. a leaf that draws no icon is never pickable
+        """
         super().__init__()
 
         self.parentEntity = parentEntity
         self.model = model
+        self.resources = resources
 
-        self.highlightColor = "#2dbd3e"  # neon green
-        self.baseIconColor = QColor(0, 0, 0)  # default black
-        self.baseTextColor = QColor(255, 0, 0)  # red
-        self.baseShine = 5
+        self.highlightColor = HIGHLIGHT_COLOR
+        self.baseTextColor = BASE_TEXT_COLOR
+        self.baseShine = BASE_SHINE
         self.baseIconScale = 1.0
         self.baseTextScale = 0.5
 
         if model is None:
             self.model = TreeLeafModel()
 
+        if resources is None:
+            self.resources = LeafResourcePool(self.parentEntity, camera)
+
+        self.billboardMode = billboardMode
+        self.iconPos = QVector3D(0, 0, 0)
+        self.textPos = self.model.textPosition()
+
+        # region anchors
+        # with shared billboards the camera only moves the shared transforms, the leaf keeps its translation in an
+        # anchor its entities are children of
+        self.iconAnchor = None
+        self.iconAnchorTransform = None
+        self.textAnchor = None
+        self.textAnchorTransform = None
+        iconParent = self.parentEntity
+        textParent = self.parentEntity
+
+        if billboardMode == LeafBillboardMode.SHARED:
+            if drawsIcon:
+                self.iconAnchor, self.iconAnchorTransform = self.__anchor()
+                iconParent = self.iconAnchor
+            if drawsLabel:
+                self.textAnchor, self.textAnchorTransform = self.__anchor()
+                textParent = self.textAnchor
+        # endregion
+
         # region Icon Entity
-        self.iconEntity = Qt3DCore.QEntity(self.parentEntity)
-        self.iconMesh = Qt3DExtras.QCuboidMesh(self.parentEntity)
-
-        if self.model.isFile():
-            self.iconMesh = Qt3DRender.QMesh(self.parentEntity)
-            self.iconMesh.setSource(QUrl("qrc:/meshes/file_light.obj"))
-        if self.model.isFolder():
-            self.iconMesh = Qt3DRender.QMesh(self.parentEntity)
-            self.iconMesh.setSource(QUrl("qrc:/meshes/folder_light.obj"))
-
-        self.iconObjectPicker = Qt3DRender.QObjectPicker(self.parentEntity)
-        self.iconMaterial = Qt3DExtras.QPhongMaterial(self.parentEntity)
-        if model.isFile():
-            self.baseIconColor = QColor(50, 130, 246)  # blue
-        if model.isDrive():
-            self.baseIconColor = QColor(128, 128, 128)  # grey
-        if model.isFolder():
-            self.baseIconColor = QColor(255, 201, 14)  # yellow
-
-        self.iconMaterial.setDiffuse(self.baseIconColor)
-        self.iconMaterial.setAmbient(self.baseIconColor)
-        # self.iconMaterial.setSpecular(self.baseIconColor)
-        self.iconMaterial.setShininess(self.baseShine)
-
-        self.iconTransform = LookAtTransform(camera, parent=self.parentEntity)
-
-        self.iconEntity.addComponent(self.iconMesh)
-        self.iconEntity.addComponent(self.iconObjectPicker)
-        self.iconEntity.addComponent(self.iconTransform)
-        self.iconEntity.addComponent(self.iconMaterial)
+        self.iconEntity = None
+        self.iconMesh = None
+        self.iconMaterial = None
+        self.iconLod = None
+        self.iconObjectPicker = None
+        self.iconTransform = None
+        self.baseIconColor = leafIconColor(self.model.leafType)
+
+        if drawsIcon:
+            self.iconEntity = Qt3DCore.QEntity(iconParent)
+            self.iconMesh = self.resources.iconMesh(self.model.leafType)
+            self.iconMaterial = self.resources.iconMaterial(self.model.leafType)
+
+            # the components of the leaf are children of its entities, deleted with them
+            if pickable:
+                self.iconObjectPicker = Qt3DRender.QObjectPicker(self.iconEntity)
+                self.iconEntity.addComponent(self.iconObjectPicker)
+            if billboardMode == LeafBillboardMode.SHARED:
+                self.iconTransform = self.resources.billboard(self.baseIconScale)
+            else:
+                self.iconTransform = LookAtTransform(camera, parent=self.iconEntity)
+
+            self.iconEntity.addComponent(self.iconTransform)
+            self.iconEntity.addComponent(self.iconMesh)
+            self.iconEntity.addComponent(self.iconMaterial)
+            # Qt3D picks the level from the distance to the camera, the mesh is only swapped when it changes.
+            # types with a single mesh get one as well, the leaf may be rebound to a type with levels
+            self.iconLod = Qt3DRender.QLevelOfDetail(self.iconEntity)
+            self.iconLod.setCamera(camera)
+            self.iconLod.setThresholdType(Qt3DRender.QLevelOfDetail.ThresholdType.DistanceToCameraThreshold)
+            self.iconLod.setThresholds([*LOD_DISTANCES, float("inf")])
+            self.iconLod.currentIndexChanged.connect(self.__handleLodChanged)
+            self.iconEntity.addComponent(self.iconLod)
 
         # endregion
 
         # region text
         # define the text entity
-        self.textEntity = Qt3DCore.QEntity(self.parentEntity)
-        self.textMaterial = Qt3DExtras.QPhongMaterial(self.parentEntity)
-        self.textMaterial.setDiffuse(self.baseTextColor)
-
-        self.textTransform = LookAtTransform(camera, scale=0.4, parent=self.parentEntity)
-        self.textTransform.rotationChanged.connect(self.handleTextRotationChanged)
-        self.textTransform.scaleChanged.connect(self.handleTextScaleChanged)
-        self.textTransform.matrixChanged.connect(self.handleTextRotationMatrixChanged)
-
-        self.textMesh = Qt3DExtras.QExtrudedTextMesh(self.parentEntity)
-        self.textMesh.setText(model.text)
-        self.textMesh.setDepth(0.01)
-        self.textMesh.setFont(QFont('monospace'))
-
-        self.textEntity.addComponent(self.textMaterial)
-        self.textEntity.addComponent(self.textMesh)
-        self.textEntity.addComponent(self.textTransform)
+        self.textEntity = None
+        self.textMaterial = None
+        self.textTransform = None
+        self.textMesh = None
+
+        if drawsLabel:
+            self.textEntity = Qt3DCore.QEntity(textParent)
+            self.textMaterial = self.resources.textMaterial()
+
+            if billboardMode == LeafBillboardMode.SHARED:
+                self.textTransform = self.resources.billboard(0.4)
+            else:
+                self.textTransform = LookAtTransform(camera, scale=0.4, parent=self.textEntity)
+                self.textTransform.rotationChanged.connect(self.handleTextRotationChanged)
+                self.textTransform.scaleChanged.connect(self.handleTextScaleChanged)
+                self.textTransform.matrixChanged.connect(self.handleTextRotationMatrixChanged)
+
+            self.textMesh = Qt3DExtras.QExtrudedTextMesh(self.textEntity)
+            self.textMesh.setText(self.model.text)
+            self.textMesh.setDepth(0.01)
+            self.textMesh.setFont(QFont('monospace'))
+
+            self.textEntity.addComponent(self.textMaterial)
+            self.textEntity.addComponent(self.textMesh)
+            self.textEntity.addComponent(self.textTransform)
         # endregion
 
-        self.iconObjectPicker.clicked.connect(self.__handleClick)
+        if self.iconObjectPicker is not None:
+            self.iconObjectPicker.clicked.connect(self.__handleClick)
 
     def moveTo(self, pos: QVector3D):
         """
@@ -136,12 +152,46 @@ class TreeLeaf(QObject):
         :return:
         """
         p, q = self.model.computeIconTextPositions(pos)
+        self.iconPos = p
+        self.textPos = q
+
+        if self.billboardMode == LeafBillboardMode.SHARED:
+            if self.iconAnchorTransform is not None:
+                self.iconAnchorTransform.setTranslation(p)
+            if self.textAnchorTransform is not None:
+                self.textAnchorTransform.setTranslation(q)
+            return
+
+        if self.iconTransform is not None:
+            self.iconTransform.setPosition(p)
+            self.iconTransform.update_rotation()
+        if self.textTransform is not None:
+            self.textTransform.setPosition(q)
+            self.textTransform.update_rotation()
+
+    def position(self) -> QVector3D:
+        """
+        gets the position of the icon
+        :return:
+        """
+        return self.iconPos
 
-        self.iconTransform.setPosition(p)
-        self.textTransform.setPosition(q)
+    def textPosition(self) -> QVector3D:
+        """
+        gets the position of the label
+        :return:
+        """
+        return self.textPos
 
-        self.iconTransform.update_rotation()
-        self.textTransform.update_rotation()
+    def __anchor(self) -> tuple[Qt3DCore.QEntity, Qt3DCore.QTransform]:
+        """
+        creates an entity holding only a translation
+        :return:
+        """
+        entity = Qt3DCore.QEntity(self.parentEntity)
+        transform = Qt3DCore.QTransform(entity)
+        entity.addComponent(transform)
+        return entity, transform
 
     def __handleClick(self, event: Qt3DRender.QPickEvent):
         """
@@ -152,6 +202,16 @@ class TreeLeaf(QObject):
         opts = LeafClickOptions(self.model, event)
         self.clicked.emit(opts)
 
+    def __handleLodChanged(self, level: int):
+        """
+        swaps the icon mesh for the one of the new level of detail
+        :param level:
+        :return:
+        """
+        mesh = self.resources.iconMesh(self.model.leafType, level)
+        self.__swapComponent(self.iconEntity, self.iconMesh, mesh)
+        self.iconMesh = mesh
+
     def handleTextRotationChanged(self, rotation: QQuaternion):
         return
 
@@ -161,44 +221,106 @@ class TreeLeaf(QObject):
     def handleTextScaleChanged(self, scale: float):
         return
 
+    def rebind(self, model: TreeLeafModel):
+        """
+        makes the leaf show another item, keeping its entities. the leaf is left without highlight and must be moved
+        to the place of the new item
+        :param model:
+        :return:
+        """
+        self.removeHighlight()
+        self.model = model
+        self.baseIconColor = leafIconColor(model.leafType)
+
+        if self.iconMaterial is not None:
+            level = 0 if self.iconLod is None else max(self.iconLod.currentIndex(), 0)
+            mesh = self.resources.iconMesh(model.leafType, level)
+            self.__swapComponent(self.iconEntity, self.iconMesh, mesh)
+            self.iconMesh = mesh
+
+            material = self.resources.iconMaterial(model.leafType)
+            self.__swapComponent(self.iconEntity, self.iconMaterial, material)
+            self.iconMaterial = material
+
+        if self.textMesh is not None:
+            self.textMesh.setText(model.text)
+
     def setEnabled(self, state):
-        self.iconEntity.setEnabled(state)
-        self.textEntity.setEnabled(state)
+        if self.iconEntity is not None:
+            self.iconEntity.setEnabled(state)
+        if self.textEntity is not None:
+            self.textEntity.setEnabled(state)
+
+    def entityCount(self) -> int:
+        """
+        counts the entities of the leaf, anchors included
+        :return:
+        """
+        return sum(1 for entity in (self.iconEntity, self.textEntity, self.iconAnchor, self.textAnchor)
+                   if entity is not None)
 
     def removeAllComponents(self):
-        self.iconEntity.removeComponent(self.iconMesh)
-        self.iconEntity.removeComponent(self.iconObjectPicker)
-        self.iconEntity.removeComponent(self.iconTransform)
-        self.iconEntity.removeComponent(self.iconMaterial)
+        if self.iconEntity is not None:
+            for component in self.iconEntity.components():
+                self.iconEntity.removeComponent(component)
+        if self.textEntity is not None:
+            for component in self.textEntity.components():
+                self.textEntity.removeComponent(component)
+
+    def dispose(self):
+        """
+        destroys the entities and components of the leaf. the leaf must not be used afterwards.
+        its own components are children of its entities and go with them, the meshes, materials, picking proxy and
+        shared billboards belong to the scene and are left alone
+        :return:
+        """
+        if self.iconObjectPicker is not None:
+            self.iconObjectPicker.clicked.disconnect(self.__handleClick)
+        if self.iconLod is not None:
+            self.iconLod.currentIndexChanged.disconnect(self.__handleLodChanged)
 
-        self.textEntity.removeComponent(self.textMaterial)
-        self.textEntity.removeComponent(self.textMesh)
-        self.textEntity.removeComponent(self.textTransform)
+        roots = (self.iconAnchor, self.textAnchor) if self.billboardMode == LeafBillboardMode.SHARED else \
+            (self.iconEntity, self.textEntity)
+        for root in roots:
+            if root is not None:
+                root.deleteLater()
 
     def highlight(self):
         """
         changes the color of the leaf to the highlight color
         :return:
         """
-        self.iconMaterial.setDiffuse(self.highlightColor)
-        self.iconMaterial.setAmbient(self.highlightColor)
-        self.iconMaterial.setSpecular(self.highlightColor)
-        self.iconMaterial.setShininess(10)
+        if self.iconMaterial is not None:
+            self.__swapComponent(self.iconEntity, self.iconMaterial, self.resources.iconHighlightMaterial())
+            self.iconMaterial = self.resources.iconHighlightMaterial()
 
-        self.textMaterial.setDiffuse(self.highlightColor)
-        self.textMaterial.setAmbient(self.highlightColor)
-        self.textMaterial.setSpecular(self.highlightColor)
-        self.textMaterial.setShininess(10)
+        if self.textEntity is not None:
+            self.__swapComponent(self.textEntity, self.textMaterial, self.resources.textHighlightMaterial())
+            self.textMaterial = self.resources.textHighlightMaterial()
 
     def removeHighlight(self):
         """
         removes the highlight from the leaf
         :return:
         """
-        self.iconMaterial.setDiffuse(self.baseIconColor)
-        self.iconMaterial.setAmbient(self.baseIconColor)
-        self.iconMaterial.setShininess(self.baseShine)
+        if self.iconMaterial is not None:
+            self.__swapComponent(self.iconEntity, self.iconMaterial, self.resources.iconMaterial(self.model.leafType))
+            self.iconMaterial = self.resources.iconMaterial(self.model.leafType)
+
+        if self.textEntity is not None:
+            self.__swapComponent(self.textEntity, self.textMaterial, self.resources.textMaterial())
+            self.textMaterial = self.resources.textMaterial()
 
-        self.textMaterial.setDiffuse(self.baseTextColor)
-        self.textMaterial.setAmbient(self.baseTextColor)
-        self.textMaterial.setShininess(self.baseShine)
+    @staticmethod
+    def __swapComponent(entity: Qt3DCore.QEntity, current: Qt3DCore.QComponent, component: Qt3DCore.QComponent):
+        """
+        replaces a component of an entity
+        :param entity:
+        :param current: the component the entity has now
+        :param component: the component it gets instead
+        :return:
+        """
+        if current is component:
+            return
+        entity.removeComponent(current)
+        entity.addComponent(component)
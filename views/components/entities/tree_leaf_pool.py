@@ -0,0 +1,60 @@
+from typing import Callable
+
+from models.tree_leaf_model import TreeLeafModel
+from views.components.entities.tree_leaf import TreeLeaf
+
+
+class TreeLeafPool:
+    def __init__(self, factory: Callable[[TreeLeafModel], TreeLeaf], capacity: int = 2000):
+        """
+        keeps the leaves taken out of a scene to show other items later, instead of creating new entities for every
+        navigation. leaves released past the capacity are destroyed
+        :param factory: creates a leaf for a model when there is no spare one
+        :param capacity: most spare leaves kept
+        """
+        self.__factory = factory
+        self.__capacity = capacity
+        self.__spares: list[TreeLeaf] = []
+
+    def acquire(self, model: TreeLeafModel) -> TreeLeaf:
+        """
+        gets a leaf showing model, recycled when possible
+        :param model:
+        :return:
+        """
+        if not self.__spares:
+            return self.__factory(model)
+
+        leaf = self.__spares.pop()
+        leaf.rebind(model)
+        leaf.setEnabled(True)
+        return leaf
+
+    def release(self, leaf: TreeLeaf):
+        """
+        takes a leaf out of its scene. it is hidden and kept for acquire, or destroyed when the pool is full
+        :param leaf:
+        :return:
+        """
+        if len(self.__spares) >= self.__capacity:
+            leaf.dispose()
+            return
+
+        leaf.removeHighlight()
+        leaf.setEnabled(False)
+        self.__spares.append(leaf)
+
+    def trim(self, size: int = 0):
+        """
+        destroys the spare leaves past size
+        :param size:
+        :return:
+        """
+        while len(self.__spares) > size:
+            self.__spares.pop().dispose()
+
+    def spareCount(self) -> int:
+        return len(self.__spares)
+
+    def capacity(self) -> int:
+        return self.__capacity
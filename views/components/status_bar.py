@@ -1,8 +1,11 @@
 import os.path
 
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QStatusBar, QLabel
 
 from core.utils.helpers import countItemsInDirectory
+from core.utils.perf_monitor import perfMonitor
+from models.directory_snapshot import DirectorySnapshot
 
 
 class VStatusBar(QStatusBar):
@@ -12,11 +15,52 @@ class VStatusBar(QStatusBar):
         self.numItemsLabel = QLabel(" 0 items ")
         self.permanentWidget = QLabel("File World    ")
 
+        # timings of the scene and the tasks, hidden until asked for
+        self.perfLabel = QLabel()
+        self.perfLabel.setVisible(False)
+        self.perfTimer = QTimer(self)
+        self.perfTimer.setInterval(500)
+        self.perfTimer.timeout.connect(self.updatePerformance)
+
         self.addPermanentWidget(self.permanentWidget)
         self.addWidget(self.numItemsLabel)
+        self.addWidget(self.perfLabel)
 
         self.setSizeGripEnabled(False)
 
+    def showPerformance(self, state: bool):
+        """
+        shows or hides the timings of the perf monitor, refreshed twice a second while shown
+        :param state:
+        :return:
+        """
+        self.perfLabel.setVisible(state)
+        if state:
+            self.updatePerformance()
+            self.perfTimer.start()
+        else:
+            self.perfTimer.stop()
+
+    def updatePerformance(self):
+        """
+        shows the latest timings. listing against entities and frame tells an i/o bound directory from a render
+        bound one
+        :return:
+        """
+        timers, values = perfMonitor.samples()
+
+        def ms(name: str) -> str:
+            timer = timers.get(name)
+            return "-" if timer is None else f"{timer[0] * 1000:.1f}"
+
+        frame = timers.get("frame")
+        fps = f"{1 / frame[1]:.0f}" if frame is not None and frame[1] > 0 else "-"
+        self.perfLabel.setText(f" list {ms('listing')} · layout {ms('layout')} · entities {ms('entity_build')} · "
+                               f"build {ms('build')} · frame {ms('frame')} ms ({fps} fps) · "
+                               f"{values.get('entity_count', 0):,} entities ")
+        self.perfLabel.setToolTip("\n".join(f"{name}: {last * 1000:.1f} ms, average {average * 1000:.1f} ms "
+                                            f"over {count}" for name, (last, average, count) in sorted(timers.items())))
+
     def updateNumItems(self, path: str):
         """
         counts items in the provided path and updates the numItemsLabel
@@ -29,3 +73,11 @@ class VStatusBar(QStatusBar):
         count = countItemsInDirectory(path)
         self.numItemsLabel.setText(f" {count} items ")
 
+    def updateFromSnapshot(self, snapshot: DirectorySnapshot):
+        """
+        updates the numItemsLabel from an existing listing, without reading the directory again
+        :param snapshot:
+        :return:
+        """
+        self.numItemsLabel.setText(f" {snapshot.count()} items ")
+
@@ -6,15 +6,17 @@ from PySide6.QtGui import QIcon, QAction
 from PySide6.QtWidgets import QWidget, QGridLayout, QSplitter
 from qframelesswindow import FramelessMainWindow, StandardTitleBar
 
-from core.structs import AppActionTypes
+from core.structs import AppActionTypes, LaunchPolicy
 from core.utils.assets_importer import qrcImage
-from core.utils.helpers import getDirectorProperties, openFile
+from core.utils.helpers import computeDirectorySize, getPathProperties, openFile
 from core.utils.path_manager import PathManager
+from core.utils.perf_monitor import perfMonitor
 from core.utils.process_manager import ProcessManger
 from models.sub_process_item_model import SubProcessItemModel
+from models.task_progress_model import TaskProgress
 from views.components.menubar_widgets import VNavigationButtons, VOptionsButtons, VSearchBarWidget
 from views.components.status_bar import VStatusBar
-from views.sections.scene import V3DWindow
+from views.sections.scene import V3DWindow, FRAME_BUDGET
 from views.sections.properties_panel import VPropertiesPanel
 
 
@@ -25,6 +27,7 @@ class FileExplorer(FramelessMainWindow):
         # define helpers
         self.pathManager = PathManager()
         self.processManager = ProcessManger()
+        self.__propsPath: str | None = None
 
         # define window components
         self.navigationButtons = VNavigationButtons()
@@ -42,7 +45,7 @@ class FileExplorer(FramelessMainWindow):
         self._titleBar.hBoxLayout.insertWidget(8, self.optionsButtons, 1, Qt.AlignmentFlag.AlignRight)
 
         # region - 3d scene
-        self.view = V3DWindow()
+        self.view = V3DWindow(processManager=self.processManager, frameBudget=FRAME_BUDGET, cachedScenes=4)
         container3d = self.createWindowContainer(self.view)
         # endregion
 
@@ -83,7 +86,7 @@ class FileExplorer(FramelessMainWindow):
     def __initialize(self):
         self.setStatusBar(self.customStatusBar)
         self.updateNavBar(self.pathManager.currentPath())
-        self.customStatusBar.updateNumItems(self.pathManager.currentPath())
+        self.customStatusBar.updateFromSnapshot(self.view.snapshot())
         self.propsPanel.stackedLayout.setCurrentIndex(1)
 
     # endregion
@@ -95,6 +98,17 @@ class FileExplorer(FramelessMainWindow):
         self.view.currentDirectoryChanged.connect(self.__handleCurrentDirChanged)
         self.view.showOptions.connect(self.__handleShowItemProperties)
         self.view.openFile.connect(self.__handleOpenFile)
+        self.view.snapshotChanged.connect(self.customStatusBar.updateFromSnapshot)
+
+        # F12 toggles the timings in the status bar
+        perfAction = QAction(self)
+        perfAction.setShortcut("F12")
+        perfAction.setCheckable(True)
+        # the scene is a window of its own, the shortcut has to work while it has the focus
+        perfAction.setShortcutContext(Qt.ShortcutContext.ApplicationShortcut)
+        perfAction.toggled.connect(self.customStatusBar.showPerformance)
+        perfAction.toggled.connect(self.view.setFrameTiming)
+        self.addAction(perfAction)
 
     # endregion
 
@@ -105,9 +119,8 @@ class FileExplorer(FramelessMainWindow):
         :param path:
         :return:
         """
-        # changes the ssearch bar text
+        # changes the ssearch bar text, the item count follows the scene's snapshot
         self.searchBarWidget.setDirectoryInput(path)
-        self.customStatusBar.updateNumItems(self.pathManager.currentPath())
 
         # update the navbar icons
         if self.pathManager.isOnlyPath():
@@ -152,25 +165,45 @@ class FileExplorer(FramelessMainWindow):
         :param path:
         :return:
         """
+        self.__propsPath = path
         self.propsPanel.hidePlaceholder()
         self.propsPanel.activeItemLabel.setText(str(Path(path).name))
-        self.propsPanel.changePreviewIcon(path)
 
-        def propFetchComplete(props):
-            if not isinstance(props, list):
-                print(props)
+        with perfMonitor.measure("properties"):
+            # items of the scene are described by its snapshot, anything else is read from disk
+            entry = self.view.snapshot().entry(path)
+            if entry is not None:
+                self.propsPanel.togglePreviewIcon("folder" if entry.isDirectory() else "file")
+                isDir = entry.isDirectory()
+            else:
+                self.propsPanel.changePreviewIcon(path)
+                isDir = os.path.isdir(path)
+            self.propsPanel.setProperties(getPathProperties(path, entry))
+
+        if not isDir:
+            return
+
+        # results of a size job started for an item that is no longer shown are ignored
+        def sizeProgress(progress: TaskProgress):
+            if self.__propsPath != path:
                 return
-            if len(props) == 0:
+            self.propsPanel.setPropertyValue(
+                "Size", f"{progress.bytesDone:,} bytes so far ({progress.itemsDone:,} items scanned)")
+
+        def sizeComplete(size):
+            if self.__propsPath != path:
                 return
-            for i, items in enumerate(props):
-                self.propsPanel.activeItemPropertiesTable.setItem(i, 0, items[0])
-                self.propsPanel.activeItemPropertiesTable.setItem(i, 1, items[1])
+            self.propsPanel.setPropertyValue("Size", f"{size:,} bytes")
 
-        def propsFetchFailed(error):
+        def sizeFailed(error):
             print("Failed with error", error)
 
-        p = SubProcessItemModel('fetch_props', getDirectorProperties, path, propFetchComplete, propsFetchFailed,
-                                name="GET_DIR_SIZE")
+        # a newer selection cancels the size walk of the previous one, selecting the same folder again joins it.
+        # the size depends on the whole tree, finished walks are left to the size cache which checks all of it
+        p = SubProcessItemModel('fetch_props', computeDirectorySize, path, sizeComplete, sizeFailed,
+                                name="GET_DIR_SIZE", onProgress=sizeProgress, cancellable=True,
+                                policy=LaunchPolicy.SUPERSEDE, memoKey=("directory size", path), memoPaths=[path],
+                                memoResult=False)
         self.processManager.launch(p)
 
     def __handleSearchButtonPressed(self, _=None):
@@ -218,7 +251,7 @@ class FileExplorer(FramelessMainWindow):
 
         if action.data() == AppActionTypes.REFRESH:
             p = self.pathManager.currentPath()
-            self.view.updateScene(p)
+            self.view.refreshScene()
 
         if p is not None and os.path.exists(p):
             self.updateNavBar(p)
@@ -237,6 +270,11 @@ class FileExplorer(FramelessMainWindow):
         """
         openFile(path)
 
+    def closeEvent(self, event):
+        # the worker processes would otherwise keep the application alive
+        self.processManager.shutdown()
+        super().closeEvent(event)
+
     # endregion
 
     # region connect signals
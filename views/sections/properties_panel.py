@@ -1,7 +1,7 @@
 import os.path
 
 from PySide6.QtGui import QPixmap, Qt
-from PySide6.QtWidgets import QWidget, QStackedLayout, QLabel, QVBoxLayout, QGridLayout, QTableWidget
+from PySide6.QtWidgets import QWidget, QStackedLayout, QLabel, QVBoxLayout, QGridLayout, QTableWidget, QTableWidgetItem
 
 from core.utils.assets_importer import qrcImage
 from views.components.placeholder_widget import VPlaceholderWidget
@@ -68,6 +68,32 @@ class VPropertiesPanel(VScrollWidget):
     def hidePlaceholder(self):
         self.stackedLayout.setCurrentIndex(1)
 
+    def setProperties(self, props: list[list[QTableWidgetItem]]):
+        """
+        fills the properties table with (name, value) rows
+        :param props:
+        :return:
+        """
+        self.activeItemPropertiesTable.clearContents()
+        self.activeItemPropertiesTable.setRowCount(max(4, len(props)))
+        for i, items in enumerate(props):
+            self.activeItemPropertiesTable.setItem(i, 0, items[0])
+            self.activeItemPropertiesTable.setItem(i, 1, items[1])
+
+    def setPropertyValue(self, name: str, value: str):
+        """
+        changes the value of the row with the given name
+        :param name:
+        :param value:
+        :return:
+        """
+        for i in range(self.activeItemPropertiesTable.rowCount()):
+            item = self.activeItemPropertiesTable.item(i, 0)
+            valueItem = self.activeItemPropertiesTable.item(i, 1)
+            if item is not None and valueItem is not None and item.text() == name:
+                valueItem.setText(value)
+                return
+
     def changePreviewIcon(self, path: str):
         """
         changes the preview icon
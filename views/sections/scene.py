@@ -1,39 +1,155 @@
 import os
+import time
+from collections import deque
 
 import numpy as np
 from PySide6.Qt3DCore import (Qt3DCore)
 from PySide6.Qt3DExtras import (Qt3DExtras)
+from PySide6.Qt3DLogic import Qt3DLogic
 from PySide6.Qt3DRender import Qt3DRender
-from PySide6.QtCore import (Signal, QDir)
-from PySide6.QtGui import (QVector3D)
-
-from core.utils.helpers import directoryType
+from PySide6.QtCore import (Signal, QDir, QFileSystemWatcher, QTimer, QPointF, QThread)
+from PySide6.QtGui import (QColor, QVector3D, QGuiApplication, QMouseEvent)
+
+from core.signal_bus import signalBus
+from core.structs import LaunchPolicy, LeafBillboardMode, LeafLabelMode, LeafPickMode, LeafRenderMode
+from core.utils.helpers import planScene
+from core.utils.perf_monitor import perfMonitor
+from core.utils.process_manager import ProcessManger
+from core.utils.scene_plan_cache import ScenePlanCache
+from core.utils.spatial_index import SpatialGrid, frustumPlanes
+from models.directory_snapshot import DirectorySnapshot
 from models.leaf_click_options import LeafClickOptions
+from models.scene_plan import ScenePlan
+from models.sub_process_item_model import SubProcessItemModel
 from models.tree_leaf_model import TreeLeafModel
 from views.components.entities.floating_grid import FloatingGrid
+from views.components.entities.glyph_labels import GlyphLabelLayer
+from views.components.entities.instanced_leaves import InstancedLeafLayer
+from views.components.entities.leaf_ray_picker import LeafRayPicker
+from views.components.entities.leaf_resources import LeafResourcePool, leafIconColor, BASE_TEXT_COLOR
+from views.components.entities.scene_cache import CachedScene, SceneCache
 from views.components.entities.tree_leaf import TreeLeaf
+from views.components.entities.tree_leaf_pool import TreeLeafPool
+
+# how far outside the view a leaf may be and still be kept alive, for the size of its icon and label
+LIVE_MARGIN = 2.0
+
+# seconds of a frame the entities of an incrementally built scene may take, leaving the rest to input and rendering
+FRAME_BUDGET = 0.008
+
+# process listing the directory of the scene being built, a newer navigation replaces it
+SCENE_PLAN_PID = "plan_scene"
+
+# process preparing the plan of the folder the user is likely to open next
+SCENE_PREFETCH_PID = "prefetch_scene"
+
+# process listing again the directory of a scene restored from the scene cache
+SCENE_REVALIDATE_PID = "revalidate_scene"
+
+# process listing again the directory of the scene after a change on disk or a refresh
+SCENE_REFRESH_PID = "refresh_scene"
+
+# most leaves kept alive across all the scenes of the scene cache
+CACHED_SCENE_LEAVES = 4000
 
 
 class V3DWindow(Qt3DExtras.Qt3DWindow):
     currentDirectoryChanged = Signal(str)
     showOptions = Signal(str)
     openFile = Signal(str)
-
-    def __init__(self):
+    snapshotChanged = Signal(object)
+    sceneBuilt = Signal()
+
+    def __init__(self, renderMode: LeafRenderMode = LeafRenderMode.ENTITY,
+                 labelMode: LeafLabelMode = LeafLabelMode.MESH,
+                 billboardMode: LeafBillboardMode = LeafBillboardMode.SHARED, maxLiveLeaves: int = 2000,
+                 pickMode: LeafPickMode = LeafPickMode.RAY, processManager: ProcessManger = None,
+                 frameBudget: float = None, cachedScenes: int = 0):
+        """
+        the 3d world showing the items of the current directory
+        :param renderMode: ENTITY gives every leaf its own icon mesh and material, INSTANCED draws all icons of a
+            type in one instanced draw call
+        :param labelMode: MESH tessellates every label into an extruded text mesh, ATLAS draws all labels from a
+            glyph atlas in one draw call
+        :param billboardMode: SHARED turns all leaves towards the camera through a couple of shared transforms,
+            PER_LEAF gives every leaf transforms of its own that follow the camera
+        :param maxLiveLeaves: directories with more items are virtualized, only the leaves in view (at most this many,
+            the nearest to the camera) have entities, recycled as the camera moves
+        :param pickMode: RAY finds the clicked leaf by casting the mouse ray against the spheres around the leaves,
+            ENTITY gives every leaf an object picker. instanced leaves have no entity to pick and are always ray picked
+        :param processManager: when set, directories are listed and their leaf models prepared on a worker thread of
+            this manager, the scene is only cleared once they are ready. listed on the gui thread when omitted
+        :param frameBudget: when set, the leaves of a scene are created a few at a time, at most this many seconds
+            per turn of the event loop. all at once when omitted.
+            a new navigation cancels both the listing and the remaining leaves of the previous one
+        :param cachedScenes: number of scenes left by navigations that are kept, disabled, for going back to them.
+            a cached scene is shown again at once and its directory listed again in the background
+        """
         super().__init__()
 
         # define variables
+        self.__renderMode: LeafRenderMode = renderMode
+        self.__labelMode: LeafLabelMode = labelMode
+        self.__billboardMode: LeafBillboardMode = billboardMode
+        self.__pickMode: LeafPickMode = LeafPickMode.RAY if renderMode == LeafRenderMode.INSTANCED else pickMode
+        self.__picker: LeafRayPicker | None = None
+        self.__pressPosition: QPointF | None = None
+        self.__instancedLeaves: InstancedLeafLayer | None = None
+        self.__labels: GlyphLabelLayer | None = None
         self.__leaves: dict[str, TreeLeaf] = {}
         self.__radius: int = 20
         self.__currentDir: str = QDir.rootPath()
         self.__others: dict[str, object] = {}
         self.__activeLeafPid: str = QDir.rootPath()
+        self.__snapshot: DirectorySnapshot = DirectorySnapshot(self.__currentDir)
+        self.__models: list[TreeLeafModel] = []
+
+        # incremental builds
+        self.__processManager: ProcessManger | None = processManager
+        self.__frameBudget: float | None = frameBudget
+        self.__planning: bool = False
+        self.__building: bool = False
+        # when the current navigation or refresh started, and the time spent creating its leaves so far
+        self.__buildStart: float = time.perf_counter()
+        self.__entityTime: float = 0.0
+        self.__pendingLeaves: deque[tuple[TreeLeafModel, QVector3D]] = deque()
+        self.__buildTimer = QTimer(self)
+        self.__buildTimer.setInterval(0)
+
+        # plans of the folders highlighted with a right click, prepared before they are opened
+        self.__planCache = ScenePlanCache()
+        self.__prefetchPath: str | None = None
+        self.__awaitingPrefetch: bool = False
+
+        # scenes left by navigations, kept with their leaves for back and forward
+        self.__sceneCache: SceneCache | None = None
+        if cachedScenes > 0:
+            self.__sceneCache = SceneCache(self.__handleSceneEvicted, cachedScenes, CACHED_SCENE_LEAVES)
+
+        # virtualized scenes
+        self.__maxLiveLeaves: int = maxLiveLeaves
+        self.__layout: np.ndarray | None = None
+        self.__index: SpatialGrid | None = None
+        self.__cullTimer = QTimer(self)
+        self.__cullTimer.setSingleShot(True)
+        self.__cullTimer.setInterval(50)
+
+        # changes to the current directory are collected for a short while, then applied in one refresh
+        self.__watcher = QFileSystemWatcher(self)
+        self.__refreshTimer = QTimer(self)
+        self.__refreshTimer.setSingleShot(True)
+        self.__refreshTimer.setInterval(250)
 
         # region - create scene
 
         # Root entity
         self.rootEntity = Qt3DCore.QEntity()
 
+        # called once per rendered frame with the time since the previous one, only while frames are timed
+        self.frameAction = Qt3DLogic.QFrameAction(self.rootEntity)
+        self.frameAction.setEnabled(False)
+        self.rootEntity.addComponent(self.frameAction)
+
         # Camera
         self.camera().lens().setPerspectiveProjection(45, 16 / 9, 0.1, 1000)
         self.camera().setPosition(QVector3D(0, 0, 40))
@@ -50,6 +166,21 @@ class V3DWindow(Qt3DExtras.Qt3DWindow):
         self.camController.setInverseTilt(True)
         self.camController.upVectorChanged.connect(self.__handleUpVectorChanged)
         self.setRootEntity(self.rootEntity)
+
+        # meshes and materials shared by every leaf of the scene
+        self.__leafResources = LeafResourcePool(self.rootEntity, self.camera())
+        # leaves out of the scene, recycled by the next navigations and the virtualized scenes
+        self.__leafPool = TreeLeafPool(self.__newLeaf, capacity=maxLiveLeaves)
+
+        if self.__renderMode == LeafRenderMode.INSTANCED:
+            self.__instancedLeaves = InstancedLeafLayer(self.rootEntity)
+        if self.__labelMode == LeafLabelMode.ATLAS:
+            self.__labels = GlyphLabelLayer(self.rootEntity)
+        if self.__pickMode == LeafPickMode.RAY:
+            self.__picker = LeafRayPicker(self.camera(), parent=self)
+
+        # entities that are not leaves, counted once. the leaves and the instanced batches are counted as they come
+        self.__sceneEntities: int = len(self.rootEntity.findChildren(Qt3DCore.QEntity))
         # endregion
 
         self.__initialize()
@@ -64,7 +195,16 @@ class V3DWindow(Qt3DExtras.Qt3DWindow):
 
     # region configure
     def __configure(self):
-        pass
+        if self.__picker is not None:
+            self.__picker.clicked.connect(self.__handleLeafClicked)
+        self.__watcher.directoryChanged.connect(self.__handleDirectoryChanged)
+        self.__refreshTimer.timeout.connect(self.refreshScene)
+        self.__cullTimer.timeout.connect(self.__updateLiveLeaves)
+        self.__buildTimer.timeout.connect(self.__buildStep)
+        perfMonitor.setProbe("leaves", self.liveLeafCount)
+        perfMonitor.setProbe("entity_count", self.entityCount)
+        self.camera().viewMatrixChanged.connect(self.__handleCameraChanged)
+        self.camera().projectionMatrixChanged.connect(self.__handleCameraChanged)
 
     # endregion
 
@@ -72,7 +212,7 @@ class V3DWindow(Qt3DExtras.Qt3DWindow):
 
     def __handleLeafClicked(self, opts: LeafClickOptions):
         if opts.pickEvent.button() == Qt3DRender.QPickEvent.Buttons.LeftButton:
-            if os.path.isfile(opts.leafModel.path):
+            if opts.leafModel.isFile():
                 self.openFile.emit(opts.leafModel.path)
                 return
 
@@ -83,12 +223,152 @@ class V3DWindow(Qt3DExtras.Qt3DWindow):
 
         if opts.pickEvent.button() == Qt3DRender.QPickEvent.Buttons.RightButton:
             self.showOptions.emit(opts.leafModel.path)
+            if opts.leafModel.isFolder() or opts.leafModel.isDrive():
+                self.prefetch(opts.leafModel.path)
 
         self.highlightLeaf(opts.leafModel.pid)
 
     def __handleUpVectorChanged(self, vector: QVector3D):
         pass
 
+    def mousePressEvent(self, event: QMouseEvent):
+        self.__pressPosition = event.position()
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        super().mouseReleaseEvent(event)
+        if self.__picker is None or self.__pressPosition is None:
+            return
+
+        # a press and release in the same place is a click, anything further is the camera being dragged
+        moved = (event.position() - self.__pressPosition).manhattanLength()
+        self.__pressPosition = None
+        if moved <= QGuiApplication.styleHints().startDragDistance():
+            self.__picker.click(event.position(), self.size(), event.button(), event.buttons(), event.modifiers())
+
+    def __handleCameraChanged(self):
+        # the live leaves follow the camera at most once per interval of the timer
+        if self.__index is not None and not self.__cullTimer.isActive():
+            self.__cullTimer.start()
+
+    def __handleFrame(self, dt: float):
+        perfMonitor.record("frame", dt)
+
+    def __handleDirectoryChanged(self, path: str):
+        signalBus.onPathChanged.emit(path)
+        if path == self.__currentDir:
+            self.__refreshTimer.start()
+
+    def __handlePlanReady(self, plan: ScenePlan):
+        self.__planning = False
+        # a plan for a directory that is not current anymore was overtaken by a navigation
+        if plan.path() != self.__currentDir:
+            return
+        self.__applyPlan(plan)
+
+    def __handlePlanFailed(self, error: Exception):
+        self.__planning = False
+        print("Failed to list the directory of the scene", error)
+        # the previous scene stays, finish building it
+        if self.__pendingLeaves:
+            self.__buildTimer.start()
+
+    def __handleRevalidated(self, plan: ScenePlan):
+        if plan.path() != self.__currentDir or self.__planning:
+            return
+        if plan.snapshot.mtimeNs == self.__snapshot.mtimeNs:
+            return
+        self.__refreshFrom(plan)
+
+    def __handleRefreshed(self, plan: ScenePlan):
+        # a navigation or a newer listing on its way made the refresh irrelevant
+        if plan.path() != self.__currentDir or self.__planning or plan.snapshot.error is not None:
+            return
+        self.__buildStart = time.perf_counter()
+        self.__refreshFrom(plan)
+
+    def __handleSceneEvicted(self, scene: CachedScene):
+        for leaf in scene.leaves.values():
+            self.__leafPool.release(leaf)
+
+    def __handlePrefetched(self, plan: ScenePlan):
+        self.__prefetchPath = None
+        if self.__awaitingPrefetch:
+            self.__awaitingPrefetch = False
+            self.__handlePlanReady(plan)
+            return
+        self.__planCache.put(plan)
+
+    def __handlePrefetchFailed(self, error: Exception):
+        self.__prefetchPath = None
+        print("Failed to prefetch a directory", error)
+        # the scene was waiting on it, list the directory the usual way
+        if self.__awaitingPrefetch:
+            self.__awaitingPrefetch = False
+            self.constructScene()
+
+    # endregion
+
+    # region getters
+
+    def renderMode(self) -> LeafRenderMode:
+        return self.__renderMode
+
+    def labelMode(self) -> LeafLabelMode:
+        return self.__labelMode
+
+    def billboardMode(self) -> LeafBillboardMode:
+        return self.__billboardMode
+
+    def pickMode(self) -> LeafPickMode:
+        return self.__pickMode
+
+    def isVirtualized(self) -> bool:
+        """
+        tells if only the leaves in view have entities
+        :return:
+        """
+        return self.__index is not None
+
+    def sceneCache(self) -> SceneCache | None:
+        return self.__sceneCache
+
+    def planCache(self) -> ScenePlanCache:
+        return self.__planCache
+
+    def isBuilding(self) -> bool:
+        """
+        tells if the scene is still being listed or still has leaves to create
+        :return:
+        """
+        return self.__planning or self.__building
+
+    def liveLeafCount(self) -> int:
+        return len(self.__leaves)
+
+    def entityCount(self) -> int:
+        """
+        counts the entities of the scene, leaves and layers alike. spare and cached leaves are not counted
+        :return:
+        """
+        count = self.__sceneEntities
+        if self.__leaves:
+            # all the leaves of a scene are built alike
+            count += len(self.__leaves) * next(iter(self.__leaves.values())).entityCount()
+        if self.__instancedLeaves is not None:
+            count += self.__instancedLeaves.batchCount()
+        return count
+
+    def leafPool(self) -> TreeLeafPool:
+        return self.__leafPool
+
+    def snapshot(self) -> DirectorySnapshot:
+        """
+        gets the listing of the directory currently shown
+        :return:
+        """
+        return self.__snapshot
+
     # endregion
 
     # region
@@ -104,20 +384,50 @@ class V3DWindow(Qt3DExtras.Qt3DWindow):
         prevLeaf = self.__leaves.get(self.__activeLeafPid)
         if prevLeaf is not None:
             prevLeaf.removeHighlight()
+            self.__setLayerColors(prevLeaf, False)
 
         leaf = self.__leaves.get(pid)
         if leaf is None:
             return False
 
         leaf.highlight()
+        self.__setLayerColors(leaf, True)
         self.__activeLeafPid = pid
 
+    def setFrameTiming(self, state: bool):
+        """
+        records the time of every rendered frame in the perf monitor, or stops doing it
+        :param state:
+        :return:
+        """
+        if state == self.frameAction.isEnabled():
+            return
+        self.frameAction.setEnabled(state)
+        if state:
+            self.frameAction.triggered.connect(self.__handleFrame)
+        else:
+            self.frameAction.triggered.disconnect(self.__handleFrame)
+
     def clearScene(self):
-        for key, leaf in self.__leaves.items():
-            leaf.removeAllComponents()
-            del leaf
+        """
+        takes every leaf out of the scene. they go back to the leaf pool, the ones it cannot keep are destroyed
+        :return:
+        """
+        for leaf in self.__leaves.values():
+            self.__leafPool.release(leaf)
 
         self.__leaves.clear()
+        self.__pendingLeaves.clear()
+        self.__buildTimer.stop()
+        self.__building = False
+        self.__layout = None
+        self.__index = None
+        self.__cullTimer.stop()
+
+        if self.__instancedLeaves is not None:
+            self.__instancedLeaves.clear()
+        if self.__labels is not None:
+            self.__labels.clear()
 
     def constructGrid(self):
         """
@@ -131,41 +441,125 @@ class V3DWindow(Qt3DExtras.Qt3DWindow):
     def constructScene(self):
         """
         takes in the particular directory and then positions them in 3d space.
-        if dirPath is none, we are in the base directory
+        if dirPath is none, we are in the base directory.
+        with a process manager, the listing happens on a worker and the scene changes once it arrives
         :return:
         """
         # return
 
-        self.clearScene()
+        self.__buildStart = time.perf_counter()
+
+        # whatever is left of the previous build is paused, then dropped with its scene. its listing is replaced by
+        # the launch below
+        self.__refreshTimer.stop()
+        self.__buildTimer.stop()
+
+        # a scene left earlier is shown as it was and checked against the disk afterwards
+        cached = None if self.__sceneCache is None else self.__sceneCache.take(self.__currentDir)
+        if cached is not None:
+            if self.__processManager is not None:
+                self.__cancelPlanning()
+            self.__restoreScene(cached)
+            self.__revalidate()
+            return
 
-        phi = np.pi * (3. - np.sqrt(5.))
+        if self.__processManager is None:
+            self.__applyPlan(planScene((self.__currentDir, self.__radius)))
+            return
 
-        dir_list = os.listdir(self.__currentDir)
-        n = len(dir_list)
+        # prefetched plans need no listing at all
+        plan = self.__planCache.take(self.__currentDir)
+        if plan is not None:
+            self.__cancelPlanning()
+            self.__applyPlan(plan)
+            return
 
-        for i in range(n):
-            # compute pos
-            y = 1 - (i / float((n + 1) - 1)) * 2  # y goes from 1 to -1
-            radius_slice = np.sqrt(1 - y * y)  # radius at y
+        # a prefetch of this very directory is still running, the scene waits on it at the priority of a listing
+        if self.__prefetchPath == self.__currentDir:
+            self.__cancelPlanning()
+            self.__planning = True
+            self.__awaitingPrefetch = True
+            self.__processManager.reprioritize(SCENE_PREFETCH_PID, QThread.Priority.HighPriority)
+            return
 
-            theta = phi * i  # golden angle increment
+        self.__awaitingPrefetch = False
+        self.__planning = True
+        p = SubProcessItemModel(SCENE_PLAN_PID, planScene, (self.__currentDir, self.__radius),
+                                self.__handlePlanReady, self.__handlePlanFailed, name="PLAN_SCENE", cancellable=True,
+                                priority=QThread.Priority.HighPriority, policy=LaunchPolicy.SUPERSEDE,
+                                memoKey=self.__planKey(self.__currentDir), memoPaths=[self.__currentDir])
+        self.__processManager.launch(p)
 
-            x = np.cos(theta) * radius_slice
-            z = np.sin(theta) * radius_slice
+    def refreshScene(self):
+        """
+        lists the current directory again and applies only the differences to the scene.
+        leaves of removed items go back to the leaf pool, new items get leaves from it, the others keep their
+        entities and are only moved to their new place on the sphere.
+        with a process manager the listing is done by a task, a newer refresh superseding an older one
+        :return:
+        """
+        self.__refreshTimer.stop()
+        # the listing on its way is newer than anything a refresh would find
+        if self.__planning:
+            return
 
-            pos = QVector3D(x * self.__radius, y * self.__radius, z * self.__radius)
+        # the listing is done again whatever the memo of the plans holds, it is what a refresh is for
+        if self.__processManager is not None:
+            p = SubProcessItemModel(SCENE_REFRESH_PID, planScene, (self.__currentDir, self.__radius),
+                                    self.__handleRefreshed, name="REFRESH_SCENE", cancellable=True,
+                                    policy=LaunchPolicy.SUPERSEDE)
+            self.__processManager.launch(p)
+            return
 
-            # create leaf
-            path = os.path.join(self.__currentDir, dir_list[i])
-            leafModel = TreeLeafModel(path, dir_list[i], directoryType(path), path)
-            leaf = TreeLeaf(self.rootEntity, self.camera(), leafModel)
-            leaf.clicked.connect(self.__handleLeafClicked)
+        self.__buildStart = time.perf_counter()
+        plan = planScene((self.__currentDir, self.__radius))
+        if plan.snapshot.error is not None:
+            return
+        self.__refreshFrom(plan)
 
-            # translate
-            leaf.moveTo(pos)
+    def __refreshFrom(self, plan: ScenePlan):
+        """
+        applies the differences between the scene and a newer plan of its directory
+        :param plan:
+        :return:
+        """
+        # an item whose type changed is replaced like a removed and added one
+        current = {e.path: e.leafType for e in plan.snapshot}
+        for pid in list(self.__leaves.keys()):
+            if current.get(pid) != self.__leaves[pid].model.leafType:
+                self.__releaseLeaf(pid)
+
+        self.__snapshot = plan.snapshot
+        self.__models = plan.models
+        self.__beginBuild()
+        if len(plan) > self.__maxLiveLeaves:
+            self.__virtualize(plan.layout)
+        else:
+            self.__layout = None
+            self.__index = None
+            self.__queueLeaves([(model, QVector3D(*pos)) for model, pos in zip(plan.models, plan.layout.tolist())])
+
+        self.__watch(self.__currentDir)
+        self.snapshotChanged.emit(self.__snapshot)
+
+    def prefetch(self, path: str):
+        """
+        prepares the plan of a directory at low priority, so that opening it next is served from the plan cache.
+        a newer prefetch replaces the one still running, unless the scene is waiting on it
+        :param path:
+        :return:
+        """
+        if self.__processManager is None or self.__awaitingPrefetch:
+            return
+        if path == self.__currentDir or path in self.__planCache or path == self.__prefetchPath:
+            return
 
-            # save
-            self.__leaves.update({leafModel.pid: leaf})
+        self.__prefetchPath = path
+        p = SubProcessItemModel(SCENE_PREFETCH_PID, planScene, (path, self.__radius),
+                                self.__handlePrefetched, self.__handlePrefetchFailed, name="PREFETCH_SCENE",
+                                cancellable=True, priority=QThread.Priority.LowestPriority,
+                                policy=LaunchPolicy.SUPERSEDE, memoKey=self.__planKey(path), memoPaths=[path])
+        self.__processManager.launch(p)
 
     def updateScene(self, path: str):
         """
@@ -183,3 +577,280 @@ class V3DWindow(Qt3DExtras.Qt3DWindow):
         self.constructScene()
 
     # endregion
+
+    # region helpers
+
+    def __planKey(self, path: str) -> tuple:
+        """
+        gets the memo key of the plan of a directory. a plan only depends on the entries of its directory, so the
+        process manager hands it back to the next listings of the directory until the directory is modified
+        :param path:
+        :return:
+        """
+        return "scene plan", path, self.__radius
+
+    def __newLeaf(self, leafModel: TreeLeafModel) -> TreeLeaf:
+        """
+        creates a leaf, for the leaf pool
+        :param leafModel:
+        :return:
+        """
+        leaf = TreeLeaf(self.rootEntity, self.camera(), leafModel, resources=self.__leafResources,
+                        drawsIcon=self.__instancedLeaves is None, drawsLabel=self.__labels is None,
+                        billboardMode=self.__billboardMode, pickable=self.__picker is None)
+        leaf.clicked.connect(self.__handleLeafClicked)
+        return leaf
+
+    def __acquireLeaf(self, leafModel: TreeLeafModel) -> TreeLeaf:
+        """
+        gives a leaf model a leaf from the leaf pool and registers it
+        :param leafModel:
+        :return:
+        """
+        leaf = self.__leafPool.acquire(leafModel)
+        self.__leaves.update({leaf.model.pid: leaf})
+        if leaf.model.pid == self.__activeLeafPid:
+            leaf.highlight()
+        return leaf
+
+    def __releaseLeaf(self, pid: str):
+        """
+        takes the leaf with the given id out of the scene, back to the leaf pool
+        :param pid:
+        :return:
+        """
+        leaf = self.__leaves.pop(pid, None)
+        if leaf is None:
+            return
+        self.__leafPool.release(leaf)
+
+    def __cancelPlanning(self):
+        """
+        stops the listing of a scene that is not wanted anymore
+        :return:
+        """
+        if self.__planning and not self.__awaitingPrefetch:
+            self.__processManager.kill(SCENE_PLAN_PID)
+        self.__planning = False
+        self.__awaitingPrefetch = False
+
+    def __leaveScene(self):
+        """
+        takes the scene out of the window before another is shown. a complete scene goes to the scene cache,
+        disabled, anything else is cleared
+        :return:
+        """
+        if self.__sceneCache is None or self.__pendingLeaves or self.__snapshot.error is not None or not self.__leaves \
+                or self.__snapshot.path == self.__currentDir:
+            self.clearScene()
+            return
+
+        leaves = self.__leaves
+        for leaf in leaves.values():
+            leaf.removeHighlight()
+            leaf.setEnabled(False)
+        scene = CachedScene(self.__snapshot, self.__models, leaves, self.__layout, self.__index)
+
+        self.__leaves = {}
+        self.clearScene()
+        self.__sceneCache.put(scene)
+
+    def __restoreScene(self, scene: CachedScene):
+        """
+        shows a scene of the scene cache again
+        :param scene:
+        :return:
+        """
+        self.__leaveScene()
+
+        self.__snapshot = scene.snapshot
+        self.__models = scene.models
+        self.__leaves = scene.leaves
+        self.__layout = scene.layout
+        self.__index = scene.index
+        for pid, leaf in self.__leaves.items():
+            leaf.setEnabled(True)
+            if pid == self.__activeLeafPid:
+                leaf.highlight()
+
+        self.__beginBuild()
+        self.__watch(self.__currentDir)
+        if self.__index is not None:
+            # the camera may have moved since, other entries may be in view
+            self.__updateLiveLeaves()
+        else:
+            self.__queueLeaves([])
+
+        self.snapshotChanged.emit(self.__snapshot)
+
+    def __revalidate(self):
+        """
+        lists the directory of a restored scene again, applying the changes made while it was cached
+        :return:
+        """
+        if self.__processManager is None:
+            self.refreshScene()
+            return
+
+        p = SubProcessItemModel(SCENE_REVALIDATE_PID, planScene, (self.__currentDir, self.__radius),
+                                self.__handleRevalidated, name="REVALIDATE_SCENE", cancellable=True,
+                                priority=QThread.Priority.LowPriority, policy=LaunchPolicy.SUPERSEDE)
+        self.__processManager.launch(p)
+
+    def __applyPlan(self, plan: ScenePlan):
+        """
+        replaces the scene with the directory of a plan. its leaves are queued, created all at once or over the
+        next frames depending on the frame budget
+        :param plan:
+        :return:
+        """
+        self.__leaveScene()
+
+        self.__snapshot = plan.snapshot
+        self.__models = plan.models
+        self.__beginBuild()
+        self.__watch(self.__currentDir)
+        if len(plan) > self.__maxLiveLeaves:
+            self.__virtualize(plan.layout)
+        else:
+            self.__queueLeaves([(model, QVector3D(*pos)) for model, pos in zip(plan.models, plan.layout.tolist())])
+
+        self.snapshotChanged.emit(self.__snapshot)
+
+    def __queueLeaves(self, leaves: list[tuple[TreeLeafModel, QVector3D]]):
+        """
+        sets the leaves left to place, in place of any queued before. the ones already alive are only moved
+        :param leaves: the (model, position) of every leaf
+        :return:
+        """
+        self.__pendingLeaves = deque(leaves)
+        if self.__frameBudget is None:
+            self.__buildStep()
+        elif not self.__buildTimer.isActive():
+            self.__buildTimer.start()
+
+    def __beginBuild(self):
+        """
+        marks the scene as being built until its queue of leaves is empty
+        :return:
+        """
+        self.__building = True
+        self.__entityTime = 0.0
+
+    def __buildStep(self):
+        """
+        places queued leaves until the frame budget is spent, the layers are synced once the queue is empty
+        :return:
+        """
+        start = time.perf_counter()
+        deadline = None if self.__frameBudget is None else start + self.__frameBudget
+        while self.__pendingLeaves:
+            leafModel, pos = self.__pendingLeaves.popleft()
+            leaf = self.__leaves.get(leafModel.pid)
+            if leaf is None:
+                leaf = self.__acquireLeaf(leafModel)
+            leaf.moveTo(pos)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        self.__entityTime += time.perf_counter() - start
+        if self.__pendingLeaves:
+            return
+
+        self.__buildTimer.stop()
+        self.__syncLayers()
+        if self.__building:
+            self.__building = False
+            perfMonitor.record("entity_build", self.__entityTime)
+            perfMonitor.record("build", time.perf_counter() - self.__buildStart)
+            self.sceneBuilt.emit()
+
+    def __virtualize(self, layout: np.ndarray):
+        """
+        keeps the layout of every entry of the snapshot without creating their leaves, then gives leaves to the ones
+        in view
+        :param layout: (N,3) positions of the entries
+        :return:
+        """
+        self.__layout = layout
+        self.__index = SpatialGrid(self.__layout)
+        self.__updateLiveLeaves(relayout=True)
+
+    def __updateLiveLeaves(self, relayout: bool = False):
+        """
+        gives leaves to the entries in view, at most maxLiveLeaves of them the nearest to the camera, and takes them
+        from the others
+        :param relayout: moves the leaves that stay alive too, when the layout changed
+        :return:
+        """
+        if self.__index is None:
+            return
+
+        camera = self.camera()
+        viewProjection = camera.projectionMatrix() * camera.viewMatrix()
+        live = self.__index.queryFrustum(frustumPlanes(np.array(viewProjection.copyDataTo())), LIVE_MARGIN)
+        if len(live) > self.__maxLiveLeaves:
+            eye = camera.position()
+            live = self.__index.nearest(np.array([eye.x(), eye.y(), eye.z()]), self.__maxLiveLeaves, live)
+
+        models = self.__models
+        wanted = {models[i].pid: i for i in live.tolist()}
+        for pid in [pid for pid in self.__leaves if pid not in wanted]:
+            self.__releaseLeaf(pid)
+
+        # the leaves go through the build queue like any other, created within the frame budget. leaves still
+        # queued by a build have not reached their place yet, they are all moved again
+        relayout = relayout or bool(self.__pendingLeaves)
+        self.__queueLeaves([(models[i], QVector3D(*self.__layout[i].tolist())) for pid, i in wanted.items()
+                            if relayout or pid not in self.__leaves])
+
+    def __syncLayers(self):
+        """
+        hands the position of every leaf to the instanced icons, the atlas labels and the ray picker, when they are
+        used
+        :return:
+        """
+        if self.__instancedLeaves is not None:
+            leaves = [(pid, leaf.model.leafType, leaf.position()) for pid, leaf in self.__leaves.items()]
+            colors = {leafType: leafIconColor(leafType) for _, leafType, _ in leaves}
+            self.__instancedLeaves.setLeaves(leaves, colors)
+
+        if self.__labels is not None:
+            labels = [(pid, leaf.model.text, leaf.textPosition()) for pid, leaf in self.__leaves.items()]
+            self.__labels.setLabels(labels, BASE_TEXT_COLOR)
+
+        if self.__picker is not None:
+            self.__picker.setLeaves(list(self.__leaves.values()))
+
+        highlighted = self.__leaves.get(self.__activeLeafPid)
+        if highlighted is not None:
+            self.__setLayerColors(highlighted, True)
+
+    def __setLayerColors(self, leaf: TreeLeaf, highlighted: bool):
+        """
+        colours the instanced icon and the atlas label of a leaf, when they are used
+        :param leaf:
+        :param highlighted:
+        :return:
+        """
+        pid = leaf.model.pid
+        if self.__instancedLeaves is not None:
+            self.__instancedLeaves.setColor(pid, QColor(leaf.highlightColor) if highlighted else leaf.baseIconColor)
+        if self.__labels is not None:
+            self.__labels.setColor(pid, QColor(leaf.highlightColor) if highlighted else leaf.baseTextColor)
+
+    def __watch(self, path: str):
+        """
+        watches path for changes, in place of whatever was watched before
+        :param path:
+        :return:
+        """
+        watched = self.__watcher.directories()
+        if watched == [path]:
+            return
+        if watched:
+            self.__watcher.removePaths(watched)
+        if os.path.isdir(path):
+            self.__watcher.addPath(path)
+
+    # endregion